@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")  # Sin ventana: los dibujos solo se rasterizan
+
+from models.graph import SocialGraph
+from models.render import figura_a_png
+from utils.generador import generar_perfiles, generar_colaboraciones
+
+# Operaciones medidas en cada tamaño de red
+OPERACIONES = ("add_node", "add_edge", "get_filtered_graph", "detect_communities", "draw_graph", "centralidad")
+CONSULTAS_FILTRO = (["Publicaciones"], ["Tesis", "Ponencias"], ["Proyectos Conjuntos", "Tutorías"])
+
+
+def cronometrar(funcion, repeticiones=1):
+    # Ejecuta la función varias veces y devuelve (segundos de la mejor ejecución, último resultado)
+    mejor = float("inf")
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def medir_tamano(n, semilla=42, omitir=(), repeticiones=3):
+    # Construye una red sintética de n perfiles y mide cada operación: {operacion: {"segundos", ...}}
+    graph = SocialGraph()
+    perfiles = list(generar_perfiles(n, semilla))
+    colaboraciones = list(generar_colaboraciones(n, semilla))
+    medidas = {}
+
+    # Las altas se cronometran una por una, como las hace la interfaz
+    segundos, _ = cronometrar(lambda: [graph.add_node(nombre, datos) for nombre, datos in perfiles])
+    medidas["add_node"] = {"segundos": segundos, "por_operacion": segundos / max(n, 1)}
+    segundos, _ = cronometrar(lambda: [graph.add_edge(*arista) for arista in colaboraciones])
+    medidas["add_edge"] = {"segundos": segundos, "por_operacion": segundos / max(len(colaboraciones), 1)}
+
+    if "get_filtered_graph" not in omitir:
+        for modo in ("or", "and"):
+            segundos, nodos = cronometrar(
+                lambda: sum(len(graph.get_filtered_graph(consulta, modo)) for consulta in CONSULTAS_FILTRO),
+                repeticiones,
+            )
+            medidas[f"get_filtered_graph_{modo}"] = {"segundos": segundos, "nodos": nodos}
+
+    if "detect_communities" not in omitir:
+        segundos, (comunidades, _) = cronometrar(graph.detect_communities)
+        medidas["detect_communities"] = {"segundos": segundos, "comunidades": len(comunidades)}
+        # Segunda llamada sin cambios: mide la caché por versión
+        segundos, _ = cronometrar(graph.detect_communities, repeticiones)
+        medidas["detect_communities_cache"] = {"segundos": segundos}
+
+    if "draw_graph" not in omitir:
+        # Se mide el dibujo sin la caché de PNG, que en la app evita repetirlo
+        segundos, png = cronometrar(lambda: figura_a_png(graph.draw_graph(communities="detect_communities" not in omitir)))
+        medidas["draw_graph"] = {"segundos": segundos, "bytes_png": len(png)}
+
+    if "centralidad" not in omitir:
+        # Grado, PageRank e intermediación aproximada (acotada por CENTRALIDAD_TIEMPO_MAX)
+        segundos, resultado = cronometrar(graph.centralidad)
+        medidas["centralidad"] = {"segundos": segundos, "muestras": resultado["muestras"], "error": resultado["error"]}
+
+    return {
+        "nodos": graph.G.number_of_nodes(),
+        "aristas": graph.G.number_of_edges(),
+        "medidas": medidas,
+    }
+
+
+def comparar(actual, anterior, tolerancia):
+    # Lista de regresiones: operaciones que tardan más de `tolerancia` veces lo registrado en la corrida anterior
+    regresiones = []
+    for tamano, resultado in actual["tamanos"].items():
+        previas = anterior.get("tamanos", {}).get(tamano, {}).get("medidas", {})
+        for operacion, medida in resultado["medidas"].items():
+            previa = previas.get(operacion)
+            if previa and previa["segundos"] > 0 and medida["segundos"] > tolerancia * previa["segundos"]:
+                regresiones.append((tamano, operacion, previa["segundos"], medida["segundos"]))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide cómo escala SocialGraph con redes académicas sintéticas.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="cantidades de perfiles a generar (p. ej. 1000 10000 100000 1000000)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--repeticiones", type=int, default=3, help="repeticiones de las operaciones rápidas")
+    parser.add_argument("--omitir", nargs="*", default=[], choices=OPERACIONES[2:],
+                        help="operaciones costosas que no se miden")
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto benchmark_<fecha>.json)")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=1.25,
+                        help="factor de tiempo sobre la corrida anterior que cuenta como regresión")
+    args = parser.parse_args(argv)
+
+    resultado = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "entorno": {"python": platform.python_version(), "plataforma": platform.platform(),
+                    "procesadores": os.cpu_count()},
+        "semilla": args.semilla,
+        "tamanos": {},
+    }
+    for n in args.tamanos:
+        print(f"Midiendo {n} perfiles...", flush=True)
+        resultado["tamanos"][str(n)] = medir_tamano(n, args.semilla, args.omitir, args.repeticiones)
+        for operacion, medida in resultado["tamanos"][str(n)]["medidas"].items():
+            print(f"  {operacion:<28} {medida['segundos']:.4f} s")
+
+    salida = args.salida or f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(salida, "w", encoding="utf-8") as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            regresiones = comparar(resultado, json.load(archivo), args.tolerancia)
+        for tamano, operacion, antes, ahora in regresiones:
+            print(f"REGRESIÓN {tamano} perfiles, {operacion}: {antes:.4f} s -> {ahora:.4f} s")
+        if regresiones:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
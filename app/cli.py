@@ -0,0 +1,187 @@
+import argparse
+import json
+import sys
+
+from models.graph import SocialGraph
+from models.persistencia import AlmacenSQLite
+from models.comunidades import modularidad_segura
+from models.centralidad import MEDIDAS
+from utils.archivos import importar_perfiles, importar_colaboraciones, exportar_perfiles, exportar_colaboraciones
+from utils.config import RUTA_BD
+
+
+def cargar_grafo(args, intereses=None, modo="or"):
+    # Arma el grafo desde archivos de perfiles/colaboraciones o desde la base de datos. Con intereses y
+    # base de datos solo se carga la porción de la red que los tiene (no hace falta leer todo)
+    graph = SocialGraph()
+    if args.perfiles or args.colaboraciones:
+        if args.perfiles:
+            cargados, omitidos = importar_perfiles(graph, args.perfiles, estricto=False)
+            print(f"{cargados} perfiles cargados ({omitidos} filas inválidas omitidas)", file=sys.stderr)
+        if args.colaboraciones:
+            cargadas, omitidas = importar_colaboraciones(graph, args.colaboraciones, estricto=False)
+            print(f"{cargadas} colaboraciones cargadas ({omitidas} filas inválidas omitidas)", file=sys.stderr)
+        return graph
+
+    almacen = AlmacenSQLite(args.bd)
+    try:
+        if intereses:
+            graph.hidratar_interes(almacen, intereses, modo)
+        else:
+            graph.hidratar(almacen)
+    finally:
+        almacen.cerrar()
+    return graph
+
+
+def subred(graph, nombres):
+    # SocialGraph nuevo con los perfiles indicados y las colaboraciones entre ellos (para exportarlo)
+    nombres = set(nombres)
+    otra = SocialGraph()
+    otra.add_nodes_from((nombre, graph.G.nodes[nombre]) for nombre in nombres)
+    otra.add_edges_from((nodo1, nodo2, peso) for nodo1, nodo2, peso in graph.aristas
+                        if nodo1 in nombres and nodo2 in nombres)
+    return otra
+
+
+def guardar_png(graph, destino, **opciones):
+    # Dibuja sin ventana (backend Agg) y escribe el PNG
+    import matplotlib
+    matplotlib.use("Agg")
+
+    with open(destino, "wb") as archivo:
+        archivo.write(graph.draw_graph_png(**opciones))
+
+
+def escribir_json(datos, destino):
+    if destino in (None, "-"):
+        json.dump(datos, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        with open(destino, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo, indent=2, ensure_ascii=False)
+
+
+def filtrar(args):
+    graph = cargar_grafo(args, args.intereses, args.modo)
+    nombres = sorted(graph.buscar_nodos(args.intereses, args.modo))
+    conector = " y " if args.modo == "and" else " o "
+    print(f"{len(nombres)} perfiles con {conector.join(args.intereses)}", file=sys.stderr)
+    filtrada = subred(graph, nombres)
+    if args.salida:
+        exportar_perfiles(filtrada, args.salida, args.formato)
+    else:
+        print("\n".join(nombres))
+    if args.colaboraciones_salida:
+        exportar_colaboraciones(filtrada, args.colaboraciones_salida, args.formato)
+    if args.png and nombres:
+        guardar_png(filtrada, args.png, communities=True, interes_seleccionado=args.interes or "")
+    return 0
+
+
+def comunidades(args):
+    graph = cargar_grafo(args)
+    if args.nivel is None:
+        nombradas, _ = graph.detect_communities(resolucion=args.resolucion, interes_seleccionado=args.interes)
+        resultado = {"modularidad": modularidad_segura(graph.particion(args.resolucion), graph.G)}
+    else:
+        estable = graph.comunidades_estables()
+        nivel = min(args.nivel, len(estable["dendrograma"]) - 1)
+        nombradas, _ = graph.detect_communities(nivel=nivel, interes_seleccionado=args.interes)
+        resultado = {
+            "nivel": nivel,
+            "niveles": len(estable["dendrograma"]),
+            "modularidad": modularidad_segura(graph.particion_nivel(nivel), graph.G),
+            "estabilidad": estable["estabilidad"],
+            "resolucion": estable["resolucion"],
+        }
+    if args.png:
+        guardar_png(graph, args.png, communities=True, nivel_comunidades=args.nivel,
+                    interes_seleccionado=args.interes)
+    resultado["comunidades"] = {nombre: sorted(miembros) for nombre, miembros in nombradas.items()}
+    escribir_json(resultado, args.salida)
+    return 0
+
+
+def centralidad(args):
+    graph = cargar_grafo(args)
+    ranking = graph.ranking_centralidad(args.medida, args.k, args.por, args.nivel)
+    if args.png:
+        guardar_png(graph, args.png, leyenda_tipos=True, tamano_por=args.medida)
+    estimacion = graph.centralidad()
+    escribir_json({
+        "medida": args.medida,
+        **{clave: estimacion[clave] for clave in ("muestras", "error", "confianza", "exacta")},
+        "ranking": ranking,
+    }, args.salida)
+    return 0
+
+
+def exportar(args):
+    graph = cargar_grafo(args)
+    if not (args.destino_perfiles or args.destino_colaboraciones or args.png):
+        print("Indique al menos un destino (--destino-perfiles, --destino-colaboraciones o --png)", file=sys.stderr)
+        return 2
+    if args.destino_perfiles:
+        exportar_perfiles(graph, args.destino_perfiles, args.formato)
+    if args.destino_colaboraciones:
+        exportar_colaboraciones(graph, args.destino_colaboraciones, args.formato)
+    if args.png:
+        guardar_png(graph, args.png, leyenda_tipos=True)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Analítica de la red académica sin interfaz: filtrado por intereses, comunidades, centralidad y exportación."
+    )
+    parser.add_argument("--bd", default=RUTA_BD, help="base de datos SQLite de la que se lee la red")
+    parser.add_argument("--perfiles", help="leer los perfiles de un archivo (CSV, JSONL o Parquet) en lugar de la base")
+    parser.add_argument("--colaboraciones", help="leer las colaboraciones de un archivo (CSV, JSONL o Parquet)")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    sub = subcomandos.add_parser("filtrar", help="perfiles que tienen los intereses indicados")
+    sub.add_argument("intereses", nargs="+")
+    sub.add_argument("--modo", choices=["or", "and"], default="or", help="alguno (or) o todos (and) los intereses")
+    sub.add_argument("--salida", help="exportar los perfiles encontrados (por defecto se listan sus nombres)")
+    sub.add_argument("--colaboraciones-salida", help="exportar también las colaboraciones entre ellos")
+    sub.add_argument("--formato", help="csv, jsonl o parquet (por defecto según la extensión)")
+    sub.add_argument("--interes", default="", help="interés que da nombre a su comunidad en el dibujo")
+    sub.add_argument("--png", help="dibujo de la red filtrada con sus comunidades")
+    sub.set_defaults(funcion=filtrar)
+
+    sub = subcomandos.add_parser("comunidades", help="detección de comunidades en JSON")
+    sub.add_argument("--nivel", type=int,
+                     help="nivel del dendrograma de la detección con varias semillas (0 = más finas)")
+    sub.add_argument("--resolucion", type=float, default=1.0, help="resolución de Louvain (sin --nivel)")
+    sub.add_argument("--interes", default="", help="interés que da nombre a la primera comunidad que lo contiene")
+    sub.add_argument("--salida", help="archivo JSON de resultados (por defecto la salida estándar)")
+    sub.add_argument("--png", help="dibujo de la red coloreada por comunidad")
+    sub.set_defaults(funcion=comunidades)
+
+    sub = subcomandos.add_parser("centralidad", help="perfiles más centrales en JSON")
+    sub.add_argument("--medida", choices=MEDIDAS, default="pagerank")
+    sub.add_argument("--k", type=int, default=10, help="cantidad de perfiles (por grupo si se desglosa)")
+    sub.add_argument("--por", help="desglosar por un atributo del perfil (tipo, facultad...) o por comunidad")
+    sub.add_argument("--nivel", type=int, help="nivel del dendrograma de las comunidades (con --por comunidad)")
+    sub.add_argument("--salida", help="archivo JSON de resultados (por defecto la salida estándar)")
+    sub.add_argument("--png", help="dibujo de la red con el tamaño de los nodos según la medida")
+    sub.set_defaults(funcion=centralidad)
+
+    sub = subcomandos.add_parser("exportar", help="exportar la red a archivos")
+    sub.add_argument("--destino-perfiles")
+    sub.add_argument("--destino-colaboraciones")
+    sub.add_argument("--formato", help="csv, jsonl o parquet (por defecto según la extensión)")
+    sub.add_argument("--png", help="dibujo de la red completa")
+    sub.set_defaults(funcion=exportar)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.funcion(args)
+    except ValueError as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
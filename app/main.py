@@ -1,23 +1,33 @@
+import json
 import streamlit as st
 import networkx as nx
-import matplotlib.pyplot as plt
 from models.graph import SocialGraph
-from utils.config import INTERESES_OPCIONES
-
-
-def init_session_state():
+from models.persistencia import AlmacenSQLite
+from models.compartido import GrafoCompartido
+from models.calculos import (
+    calcular_red, calcular_red_simple, calcular_filtrado, calcular_comunidades, calcular_sugerencias,
+    calcular_centralidad,
+)
+from utils.archivos import importar_perfiles, importar_colaboraciones
+from utils import instrumentacion
+from utils.config import INTERESES_OPCIONES, RUTA_LAYOUT, RUTA_BD, BUSQUEDA_MAX_RESULTADOS, CENTRALIDAD_OPCIONES
+
+
+@st.cache_resource
+def obtener_grafo_compartido():
     
-    #Inicializa el estado de sesión de Streamlit.
+    #Crea, una sola vez por proceso del servidor, el grafo social compartido por todas las sesiones.
     
-    #Crea estructuras de datos para gestionar perfiles de usuarios,
-    #colaboraciones entre ellos y la instancia del grafo social.
+    #Abre la base de datos de perfiles y colaboraciones y carga el grafo a partir de ella;
+    #cada sesión lee instantáneas de este grafo y escribe sus cambios sobre él.
     
-    if 'perfiles' not in st.session_state:
+    almacen = AlmacenSQLite(RUTA_BD)
+    if almacen.contar_perfiles() == 0:
         
-        #Acá creamos perfiles por defecto para que al correr el programa 
-        #ya se pueda visualizar un grafo
+        #Acá creamos perfiles por defecto para que al correr el programa por primera vez
+        #ya se pueda visualizar un grafo (quedan guardados en la base de datos)
         
-        st.session_state['perfiles'] = {
+        almacen.guardar_perfiles({
         "Santiago Hernández": {
             "programa_academico": "Ingeniería de Sistemas",
             "facultad": "Facultad de Ingeniería",
@@ -99,10 +109,9 @@ def init_session_state():
             "tipo": "Profesor",
             "intereses": ["Tesis"]
         }
-    }
-    #Acá creamos las colaboraciones que "relacionan" los datos iniciales
-    if 'colaboraciones' not in st.session_state:
-        st.session_state['colaboraciones'] = [
+        }.items())
+        #Acá creamos las colaboraciones que "relacionan" los datos iniciales
+        almacen.guardar_colaboraciones([
             ("Santiago Hernández", "Patricia Rincón"),
             ("Andres Sanchez", "Lina Munera"),
             ("Cristian Llano", "Carolina Osorio"),
@@ -113,9 +122,79 @@ def init_session_state():
             ("Laura Gómez", "Santiago Hernández"),  # Relación entre estudiantes con interés en publicaciones
             ("Felipe Torres", "Andres Sanchez"),  # Relación entre estudiantes con interés en tesis
             ("Valeria Ruiz", "Cristian Llano")  # Relación entre estudiantes con interés en tesis
-        ]
-    if 'graph' not in st.session_state:
-        st.session_state['graph'] = SocialGraph()
+        ])
+    graph = SocialGraph(ruta_layout=RUTA_LAYOUT)
+    # Carga inicial del grafo desde la base de datos: se hace una sola vez por proceso; después
+    # cada botón aplica únicamente su propio cambio (delta) sobre el grafo y lo guarda en la base
+    graph.hidratar(almacen)
+    # Los cálculos costosos corren en hilos de fondo (un solo servicio para todas las sesiones)
+    return GrafoCompartido(graph, almacen)
+
+
+def init_session_state():
+    
+    #Inicializa el estado de sesión de Streamlit.
+    
+    #Cada sesión guarda solo una referencia al grafo compartido del proceso.
+    
+    if 'compartido' not in st.session_state:
+        st.session_state['compartido'] = obtener_grafo_compartido()
+
+
+def mostrar_instrumentacion():
+
+    #Muestra en la barra lateral el desglose de tiempos del rerun actual, los totales
+    #acumulados, las tasas de acierto de las cachés y la descarga de la traza de Chrome.
+
+    def tabla(filas):
+        # El tamaño del grafo se muestra como texto ("nodos: 10, aristas: 12")
+        return [dict(fila, ultimo_tamano=", ".join(f"{clave}: {valor}" for clave, valor in (fila["ultimo_tamano"] or {}).items()))
+                for fila in filas]
+
+    st.sidebar.subheader("Este rerun")
+    st.sidebar.dataframe(tabla(instrumentacion.resumen(solo_ciclo=True)), hide_index=True)
+    st.sidebar.subheader("Acumulado")
+    st.sidebar.dataframe(tabla(instrumentacion.resumen()), hide_index=True)
+    st.sidebar.subheader("Cachés")
+    st.sidebar.dataframe(
+        [dict(cache=nombre, **conteo) for nombre, conteo in instrumentacion.resumen_caches().items()], hide_index=True
+    )
+    st.sidebar.download_button(
+        "Descargar traza (Chrome)", json.dumps(instrumentacion.traza_chrome()),
+        file_name="traza_red_social.json", mime="application/json",
+    )
+    if st.sidebar.button("Reiniciar mediciones"):
+        instrumentacion.reiniciar()
+
+
+def mostrar_avance(estado, texto):
+
+    #Muestra el avance de un cálculo en segundo plano (el último resultado queda visible mientras tanto).
+
+    if estado.error:
+        st.error(f"{texto}: {estado.error}")
+    elif not estado.listo:
+        st.progress(estado.progreso, text=estado.mensaje or texto)
+
+
+def solicitar(servicio, nombre, funcion, *args):
+
+    #Pide un cálculo al servicio y lo anota entre los de esta sesión (los que se esperan en esta página).
+
+    st.session_state['pedidos'].add((nombre, args))
+    return servicio.solicitar(nombre, funcion, *args)
+
+
+def esperar_calculos(servicio):
+
+    #Mientras haya cálculos de esta sesión en curso revisa cada segundo, solo en este fragmento, y al
+    #terminar vuelve a ejecutar la página para mostrar los resultados frescos.
+
+    @st.fragment(run_every=1)
+    def vigilar():
+        if not servicio.ocupado(st.session_state['pedidos']):
+            st.rerun()
+    vigilar()
 
 
 def main():
@@ -196,23 +275,26 @@ def main():
     """,
     unsafe_allow_html=True
     )
-    init_session_state()
+    # Instrumentación opcional: tiempos por llamada, tamaño del grafo y aciertos de caché
+    # (el interruptor es de esta sesión; apagado, el costo por llamada es despreciable)
+    instrumentar = st.sidebar.checkbox("Instrumentación ⏱️")
+    instrumentacion.activar_hilo(instrumentar)
+    instrumentacion.nuevo_ciclo()
 
-    perfiles = st.session_state['perfiles']
-    colaboraciones = st.session_state['colaboraciones']
-    graph = st.session_state['graph']
+    with instrumentacion.bloque("main.init_session_state"):
+        init_session_state()
 
-    # Inicializar el grafo con los datos iniciales
-    for nombre, datos in perfiles.items():
-        graph.add_node(nombre, datos)
-    for nodo1, nodo2 in colaboraciones:
-        graph.add_edge(nodo1, nodo2)
+    compartido = st.session_state['compartido']
+    graph = compartido.instantanea()  # Vista inmutable de la última versión (compartida entre sesiones)
+    almacen = compartido.almacen
+    servicio = compartido.servicio
+    st.session_state['pedidos'] = set()  # Cálculos que pide esta ejecución de la página
 
     st.title("📚 Red Social Académica ✏️ ")
 
     col1, col2 = st.columns([2, 3])
 
-    with col1:
+    with col1, instrumentacion.bloque("main.columna_gestion"):
 
          # Sección para agregar un nuevo perfil al grafo
         st.header("Agregar Perfil ➕")
@@ -238,7 +320,7 @@ def main():
         # Botón para agregar o actualizar un nodo en el grafo
         if st.button("Agregar/Actualizar Nodo"):
             if nombre: # Verifica que el nombre no esté vacío
-                perfiles[nombre] = {
+                datos = {
                     'programa_academico': programa_academico,
                     'facultad': facultad,
                     'nivel': nivel,
@@ -246,48 +328,88 @@ def main():
                     'tipo': tipo_usuario,
                     'intereses': intereses_seleccionados
                 }
-                # Agregar el nodo al grafo con sus atributos
-                graph.add_node(nombre, perfiles[nombre])
+                with compartido.escribir() as vivo:
+                    # Agregar el nodo al grafo con sus atributos
+                    vivo.add_node(nombre, datos)
+                    # Guarda solo este perfil en la base de datos (no se reescribe todo el conjunto)
+                    almacen.guardar_perfil(nombre, datos)
+                graph = compartido.instantanea()
                 st.success(f"Perfil de {nombre} agregado o actualizado.")
         
+        # Sección para cargar perfiles y colaboraciones en bloque desde archivos
+        with st.expander("Importar Datos 📁"):
+            archivo_perfiles = st.file_uploader("Perfiles (CSV, JSONL o Parquet)", type=["csv", "jsonl", "json", "parquet"])
+            archivo_colaboraciones = st.file_uploader("Colaboraciones (CSV, JSONL o Parquet)", type=["csv", "jsonl", "json", "parquet"])
+            if st.button("Importar") and (archivo_perfiles or archivo_colaboraciones):
+                try:
+                    # Se carga por lotes en el grafo y en la base de datos; las filas inválidas se omiten.
+                    # Mientras dura, las demás sesiones siguen leyendo la última versión publicada
+                    with compartido.escribir() as vivo:
+                        if archivo_perfiles:
+                            cargados, omitidos = importar_perfiles(vivo, archivo_perfiles, almacen=almacen, estricto=False)
+                            st.success(f"{cargados} perfiles importados ({omitidos} filas inválidas omitidas).")
+                        if archivo_colaboraciones:
+                            cargadas, omitidas = importar_colaboraciones(vivo, archivo_colaboraciones, almacen=almacen, estricto=False)
+                            st.success(f"{cargadas} colaboraciones importadas ({omitidas} filas inválidas omitidas).")
+                except ValueError as error:
+                    st.error(str(error))
+                graph = compartido.instantanea()
+
         # Sección para gestionar colaboraciones entre perfiles
         st.header("Gestionar Colaboraciones 🤝")
-         # Selección de los nodos (perfiles) que colaborarán
-        nodo1 = st.selectbox("Nodo 1", list(perfiles.keys()), index=None)
-        nodo2 = st.selectbox("Nodo 2", list(perfiles.keys()), index=None)
+         # Selección de los nodos (perfiles) que colaborarán: se escribe una búsqueda y solo se listan los mejores resultados
+        consulta1 = st.text_input("Buscar Nodo 1", placeholder="Nombre, programa, facultad, nivel o habilidad")
+        nodo1 = st.selectbox("Nodo 1", graph.buscar_perfiles(consulta1, k=BUSQUEDA_MAX_RESULTADOS), index=None)
+        consulta2 = st.text_input("Buscar Nodo 2", placeholder="Nombre, programa, facultad, nivel o habilidad")
+        nodo2 = st.selectbox("Nodo 2", graph.buscar_perfiles(consulta2, k=BUSQUEDA_MAX_RESULTADOS), index=None)
 
         # Botón para agregar una colaboración entre dos nodos si no existe previamente
         if st.button("Agregar Colaboración") and nodo1 and nodo2 and nodo1 != nodo2:
-            if (nodo1, nodo2) not in colaboraciones and (nodo2, nodo1) not in colaboraciones:
-                colaboraciones.append((nodo1, nodo2)) # Agregar la relación a la lista de colaboraciones
-                graph.add_edge(nodo1, nodo2) # Agregar la arista al grafo
+            with compartido.escribir() as vivo:
+                # Se consulta el grafo vivo dentro del cerrojo: otra sesión pudo agregarla recién
+                agregada = (nodo1, nodo2) not in vivo.aristas # La llave es canónica: cubre ambos órdenes
+                if agregada:
+                    vivo.add_edge(nodo1, nodo2) # Agregar la arista al grafo (y al almacén de colaboraciones)
+                    almacen.guardar_colaboracion(nodo1, nodo2) # Persistir la colaboración
+            if agregada:
+                graph = compartido.instantanea()
                 st.success(f"Colaboración entre {nodo1} y {nodo2} agregada.")
 
 
         # Botón para eliminar una colaboración existente entre dos nodos
         if st.button("Eliminar Colaboración") and nodo1 and nodo2:
-            if (nodo1, nodo2) in colaboraciones:
-                colaboraciones.remove((nodo1, nodo2)) # Eliminar de la lista de colaboraciones
-                graph.remove_edge(nodo1, nodo2) # Eliminar la arista del grafo
+            with compartido.escribir() as vivo:
+                eliminada = (nodo1, nodo2) in vivo.aristas
+                if eliminada:
+                    vivo.remove_edge(nodo1, nodo2) # Eliminar la arista del grafo (y del almacén de colaboraciones)
+                    almacen.eliminar_colaboracion(nodo1, nodo2) # Eliminarla también de la base de datos
+            if eliminada:
+                graph = compartido.instantanea()
                 st.success(f"Colaboración entre {nodo1} y {nodo2} eliminada.")
-            elif (nodo2, nodo1) in colaboraciones:
-                colaboraciones.remove((nodo2, nodo1)) # Eliminar la relación en el otro orden
-                graph.remove_edge(nodo2, nodo1)
-                st.success(f"Colaboración entre {nodo2} y {nodo1} eliminada.")
             else:
                 st.warning(f"No existe colaboración entre {nodo1} y {nodo2}.")
         
+        # Botón para ver cómo se conectan dos perfiles a través de la red de colaboraciones
+        if st.button("¿Cómo están conectados?") and nodo1 and nodo2:
+            camino = graph.camino_colaboracion(nodo1, nodo2)
+            if camino:
+                st.info(f"{' → '.join(camino)} (distancia: {len(camino) - 1})")
+            else:
+                st.warning(f"{nodo1} y {nodo2} no están conectados.")
+        
         # Sección para buscar perfiles con intereses comunes
         st.header("Buscar Intereses Comunes 🧩")
-        # Dropdown para seleccionar un interés específico (excluyendo la opción 'Etc.')
-        interes_buscar = st.selectbox("Seleccione un interés para buscar perfiles relacionados", 
-                                     [i for i in INTERESES_OPCIONES if i != "Etc."])
+        # Selección de uno o varios intereses (excluyendo la opción 'Etc.')
+        intereses_buscar = st.multiselect("Seleccione intereses para buscar perfiles relacionados", 
+                                          [i for i in INTERESES_OPCIONES if i != "Etc."])
+        # Define si los perfiles deben tener alguno (O) o todos (Y) los intereses seleccionados
+        coincidencia = st.radio("Coincidencia", ["Alguno de los intereses", "Todos los intereses"], horizontal=True)
+        modo_busqueda = "and" if coincidencia == "Todos los intereses" else "or"
         
-        # Botón para realizar la búsqueda de perfiles relacionados con el interés seleccionado
-        if st.button("Buscar"):
-            fig_filtrado = graph.buscar_y_filtrar(interes_buscar)
-            if fig_filtrado:
-                st.pyplot(fig_filtrado)
+        # Botón para realizar la búsqueda de perfiles relacionados con los intereses seleccionados
+        # La vista pedida se recuerda entre reruns porque se dibuja en segundo plano
+        if st.button("Buscar") and intereses_buscar:
+            st.session_state['vista_busqueda'] = ("filtro", tuple(intereses_buscar), modo_busqueda)
 
         def buscar_y_filtrar(self, interes):
             G_filtrado = self.get_filtered_graph(interes, self.perfiles, self.colaboraciones)
@@ -299,46 +421,109 @@ def main():
         
         # Botón para restablecer la búsqueda y mostrar el grafo completo
         if st.button("Restablecer Búsqueda"):
-            fig_restablecido = graph.draw_graph() # Dibuja el grafo sin filtros
-            st.pyplot(fig_restablecido)
+            st.session_state['vista_busqueda'] = ("completa",) # Dibuja el grafo sin filtros
+
+        vista = st.session_state.get('vista_busqueda')
+        if vista:
+            if vista[0] == "filtro":
+                estado = solicitar(servicio, "busqueda", calcular_filtrado, *vista[1:])
+            else:
+                estado = solicitar(servicio, "red_simple", calcular_red_simple)
+            mostrar_avance(estado, "Dibujando la búsqueda")
+            if estado.valor:
+                st.image(estado.valor, use_container_width=True)
         
 
+        # La detección se queda visible entre reruns para poder mover el nivel de detalle
         if st.button("Detectar Comunidades"):
-            comunidades, comunidad_mapping = graph.detect_communities()  # Obtener ambas estructuras de datos
-
-            fig_comunidades = graph.draw_graph(communities=True, comunidad_mapping=comunidad_mapping)  # Pasa comunidad_mapping
-            st.pyplot(fig_comunidades)  # Muestra el grafo con las comunidades detectadas
-
-            # Iterar sobre el diccionario de comunidades correctamente
-            for comunidad, nodos in comunidades.items():
-                st.write(f"La comunidad '{comunidad}' incluye los nodos: {', '.join(nodos)}")
-
-
-    with col2:
+            st.session_state['mostrar_comunidades'] = True
+
+        if st.session_state.get('mostrar_comunidades'):
+            # Varias semillas y resoluciones en paralelo (en segundo plano): el resultado es reproducible y trae su estabilidad
+            estado = solicitar(servicio, "comunidades", calcular_comunidades, None)
+            mostrar_avance(estado, "Detectando comunidades")
+            if estado.valor is not None:
+                resultado = estado.valor["resultado"]
+                st.caption(f"Modularidad: {resultado['modularidad']:.3f} · Estabilidad entre semillas (NMI): "
+                           f"{resultado['estabilidad']:.2f} · Resolución: {resultado['resolucion']}")
+                niveles = len(resultado["dendrograma"])
+                if niveles > 1:
+                    # Niveles del dendrograma: 0 muestra las comunidades más finas, el último las más grandes
+                    nivel = st.slider("Nivel de detalle de las comunidades", 0, niveles - 1, niveles - 1)
+                    if nivel != estado.valor["nivel"]:
+                        estado = solicitar(servicio, "comunidades", calcular_comunidades, nivel)
+                        mostrar_avance(estado, "Dibujando comunidades")
+
+            if estado.valor is not None:
+                st.image(estado.valor["png"], use_container_width=True)  # Muestra el grafo con las comunidades detectadas
+
+                # Iterar sobre el diccionario de comunidades correctamente
+                for comunidad, nodos in estado.valor["comunidades"].items():
+                    st.write(f"La comunidad '{comunidad}' incluye los nodos: {', '.join(nodos)}")
+
+
+    with col2, instrumentacion.bloque("main.columna_red"):
         st.header("Red de Colaboración")
         # Genera la visualización del grafo con los nodos y conexiones actuales
-        fig = graph.draw_graph()
-        
-        # Agrega una leyenda para distinguir entre estudiantes y profesores en el grafo
-        fig.legend(handles=[
-            plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='blue', markersize=10, label='Estudiantes'),
-            plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='red', markersize=10, label='Profesores')
-        ], loc='upper right')
-        
-        st.pyplot(fig)
+        # (con leyenda para distinguir entre estudiantes y profesores); se dibuja en segundo plano y
+        # mientras tanto se muestra el último dibujo disponible
+        # Opcionalmente el tamaño de cada nodo refleja su centralidad
+        tamano_nodos = st.selectbox("Tamaño de los nodos", ["Uniforme"] + list(CENTRALIDAD_OPCIONES))
+        estado = solicitar(servicio, "red", calcular_red, CENTRALIDAD_OPCIONES.get(tamano_nodos))
+        mostrar_avance(estado, "Actualizando la red")
+        if estado.valor is not None:
+            st.image(estado.valor, use_container_width=True)
 
         # Si se ha seleccionado un primer nodo, muestra su información detallada
         if nodo1:
-            datos_nodo1 = perfiles[nodo1]  # Obtiene los datos del nodo seleccionado
+            datos_nodo1 = graph.G.nodes[nodo1]  # Obtiene los datos del nodo seleccionado
             st.markdown(f"### INFORMACIÓN DEL PRIMER NODO SELECCIONADO: \n\n**Nombre:** {nodo1}\n\n**Tipo:** {datos_nodo1['tipo']}\n\n**Programa Académico:** {datos_nodo1['programa_academico']}\n\n**Intereses:** {', '.join(datos_nodo1['intereses'])}")
 
+            # Sugerencias de colaboración (vecinos en común e intereses/habilidades compartidos)
+            estado = solicitar(servicio, "sugerencias", calcular_sugerencias, nodo1)
+            mostrar_avance(estado, "Buscando colaboradores")
+            if estado.valor:
+                # Junto a cada sugerencia se muestran los grados de separación aproximados (oráculo de landmarks)
+                st.markdown("**Colaboradores sugeridos:** " + ", ".join(
+                    f"{nombre} ({puntaje:.2f}, ~{distancia or '∞'} pasos)"
+                    for nombre, puntaje, distancia in estado.valor
+                ))
+
         if nodo2:
-            datos_nodo2 = perfiles[nodo2]  # Obtiene los datos del nodo seleccionado
+            datos_nodo2 = graph.G.nodes[nodo2]  # Obtiene los datos del nodo seleccionado
             st.markdown(f"### INFORMACIÓN DEL SEGUNDO NODO SELECCIONADO:\n\n**Nombre:** {nodo2}\n\n**Tipo:** {datos_nodo2['tipo']}\n\n**Programa Académico:** {datos_nodo2['programa_academico']}\n\n**Intereses:** {', '.join(datos_nodo2['intereses'])}")
 
-    st.session_state['perfiles'] = perfiles  # Almacena el diccionario de perfiles en la sesión.
-    st.session_state['colaboraciones'] = colaboraciones  # Guarda la lista de colaboraciones (conexiones entre nodos).
-    st.session_state['graph'] = graph  # Guarda el grafo actualizado con los nodos y relaciones.
+        # Sección con los perfiles más centrales: los más conectados, los más influyentes (PageRank)
+        # y los puentes entre grupos (intermediación), en general o por tipo, facultad o comunidad
+        st.header("Perfiles Más Centrales 🌟")
+        medida = st.selectbox("Medida de centralidad", list(CENTRALIDAD_OPCIONES))
+        desglose = st.selectbox("Desglosar por", ["Sin desglose", "Tipo", "Facultad", "Comunidad"])
+        if st.button("Calcular Centralidad"):
+            st.session_state['mostrar_centralidad'] = True
+
+        if st.session_state.get('mostrar_centralidad'):
+            por = None if desglose == "Sin desglose" else desglose.lower()
+            estado = solicitar(servicio, "centralidad", calcular_centralidad, CENTRALIDAD_OPCIONES[medida], por)
+            mostrar_avance(estado, "Calculando centralidad")
+            if estado.valor is not None:
+                valor = estado.valor
+                if not valor["exacta"]:
+                    st.caption(f"Intermediación estimada con {valor['muestras']} pares de perfiles: error ≤ "
+                               f"{valor['error']:.3f} con probabilidad {valor['confianza']:.0%}")
+                if por is None:
+                    st.dataframe([{"Perfil": nombre, medida: puntaje} for nombre, puntaje in valor["ranking"]],
+                                 hide_index=True)
+                else:
+                    for grupo, resumen in valor["ranking"].items():
+                        st.markdown(f"**{grupo or 'Sin dato'}** ({resumen['miembros']} perfiles, media "
+                                    f"{resumen['media']:.4f}): " + ", ".join(
+                                        f"{nombre} ({puntaje:.4f})" for nombre, puntaje in resumen["top"]))
+
+    if instrumentar:
+        mostrar_instrumentacion()
+    if servicio.ocupado(st.session_state['pedidos']):
+        esperar_calculos(servicio)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,105 @@
+from models.copia_escritura import CopiaEnEscritura
+
+
+class AlmacenAristas:
+    # Almacén no dirigido de colaboraciones: cada arista se identifica por su llave canónica y vive en la
+    # adyacencia de sus dos extremos, así la pertenencia, la inserción y el borrado son O(1) sin importar
+    # el orden de los nodos. La adyacencia es la única estructura, para que una copia comparta todo
+
+    def __init__(self, aristas=()):
+        self._adyacencia = {}  # nodo -> {vecino: peso}
+        self._cantidad = 0
+        self._cow_adyacencia = CopiaEnEscritura()
+        self.agregar_varias(aristas)
+
+    def copia(self):
+        # Las listas de vecinos se comparten: cada lado duplica la de un nodo solo al modificarla,
+        # así copiar cuesta O(nodos) punteros y no depende de la cantidad de aristas
+        otra = AlmacenAristas()
+        otra._adyacencia = self._cow_adyacencia.compartir(self._adyacencia)
+        otra._cantidad = self._cantidad
+        return otra
+
+    @staticmethod
+    def clave(nodo1, nodo2):
+        # Llave canónica: el mismo par en cualquier orden produce la misma llave
+        return (nodo1, nodo2) if nodo1 <= nodo2 else (nodo2, nodo1)
+
+    @staticmethod
+    def normalizar(arista):
+        # Acepta (nodo1, nodo2) o (nodo1, nodo2, peso); el peso por defecto es 1
+        if len(arista) == 3:
+            return arista
+        nodo1, nodo2 = arista
+        return nodo1, nodo2, 1
+
+    def __contains__(self, arista):
+        return arista[1] in self._adyacencia.get(arista[0], ())
+
+    def __len__(self):
+        return self._cantidad
+
+    def __iter__(self):
+        # Recorre las aristas como tuplas (nodo1, nodo2, peso) con la llave canónica, una vez cada una
+        for nodo1, vecinos in self._adyacencia.items():
+            for nodo2, peso in vecinos.items():
+                if nodo1 <= nodo2:
+                    yield nodo1, nodo2, peso
+
+    def peso(self, nodo1, nodo2, defecto=None):
+        return self._adyacencia.get(nodo1, {}).get(nodo2, defecto)
+
+    def vecinos(self, nodo):
+        # Diccionario {vecino: peso}; vacío si el nodo no tiene colaboraciones
+        return self._adyacencia.get(nodo, {})
+
+    def grado(self, nodo):
+        return len(self._adyacencia.get(nodo, ()))
+
+    def nodos(self):
+        # Nodos que participan en al menos una colaboración
+        return self._adyacencia.keys()
+
+    def agregar(self, nodo1, nodo2, peso=1):
+        # Inserta o actualiza la arista; devuelve el peso anterior (None si era nueva)
+        anterior = self.peso(nodo1, nodo2)
+        if anterior is None:
+            self._cantidad += 1
+        self._cow_adyacencia.modificable(self._adyacencia, nodo1)[nodo2] = peso
+        self._cow_adyacencia.modificable(self._adyacencia, nodo2)[nodo1] = peso
+        return anterior
+
+    def eliminar(self, nodo1, nodo2):
+        # Borra la arista si existe; devuelve True si se eliminó
+        if self.peso(nodo1, nodo2) is None:
+            return False
+        self._cantidad -= 1
+        # Un bucle (nodo1 == nodo2) vive una sola vez en la adyacencia: se borra una sola vez
+        extremos = ((nodo1, nodo2),) if nodo1 == nodo2 else ((nodo1, nodo2), (nodo2, nodo1))
+        for origen, destino in extremos:
+            vecinos = self._cow_adyacencia.modificable(self._adyacencia, origen)
+            del vecinos[destino]
+            if not vecinos:
+                del self._adyacencia[origen]
+        return True
+
+    def eliminar_nodo(self, nodo):
+        # Borra todas las aristas del nodo y devuelve las llaves canónicas eliminadas
+        eliminadas = [self.clave(nodo, vecino) for vecino in list(self.vecinos(nodo))]
+        for nodo1, nodo2 in eliminadas:
+            self.eliminar(nodo1, nodo2)
+        return eliminadas
+
+    def agregar_varias(self, aristas):
+        # Carga masiva; devuelve las aristas que cambiaron como (nodo1, nodo2, peso, peso_anterior)
+        cambiadas = []
+        for arista in aristas:
+            nodo1, nodo2, peso = self.normalizar(arista)
+            anterior = self.agregar(nodo1, nodo2, peso)
+            if anterior != peso:
+                cambiadas.append(self.clave(nodo1, nodo2) + (peso, anterior))
+        return cambiadas
+
+    def eliminar_varias(self, aristas):
+        # Borrado masivo; devuelve las llaves canónicas que existían y se eliminaron
+        return [self.clave(arista[0], arista[1]) for arista in aristas if self.eliminar(arista[0], arista[1])]
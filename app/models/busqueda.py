@@ -0,0 +1,125 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+from models.copia_escritura import CopiaEnEscritura
+
+# Campos del perfil que se indexan y cuánto pesa una coincidencia en cada uno
+PESOS_CAMPOS = {
+    "nombre": 3.0,
+    "programa_academico": 1.5,
+    "habilidades_tecnicas": 1.0,
+    "facultad": 1.0,
+    "nivel": 0.5,
+}
+
+
+def normalizar(texto):
+    # Minúsculas y sin tildes: "Rincón" y "rincon" quedan iguales
+    descompuesto = unicodedata.normalize("NFKD", str(texto).lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    return re.findall(r"\w+", normalizar(texto))
+
+
+def trigramas(token):
+    relleno = f"  {token} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceBusqueda:
+    # Índice para autocompletar perfiles: coincidencia por prefijo sobre un vocabulario ordenado y
+    # tolerancia a errores de tipeo con trigramas; devuelve solo los k mejores resultados
+
+    def __init__(self, max_expansiones=50, similitud_minima=0.4):
+        self.max_expansiones = max_expansiones  # Tokens del vocabulario que puede abarcar un prefijo
+        self.similitud_minima = similitud_minima  # Jaccard de trigramas para aceptar un token parecido
+        self._vocabulario = []  # Tokens ordenados (búsqueda por prefijo con bisect)
+        self._postings = {}  # token -> {nombre: peso del mejor campo donde aparece}
+        self._trigramas = {}  # trigrama -> tokens del vocabulario que lo contienen
+        self._documentos = {}  # nombre -> tokens indexados (para poder quitarlo)
+        self._cow_postings = CopiaEnEscritura()
+        self._cow_trigramas = CopiaEnEscritura()
+
+    def __len__(self):
+        return len(self._documentos)
+
+    def copia(self):
+        # Postings y trigramas se comparten hasta que uno de los dos lados los modifica; los conjuntos de
+        # _documentos se reemplazan y nunca se modifican, así que basta la copia superficial
+        otra = IndiceBusqueda(self.max_expansiones, self.similitud_minima)
+        otra._vocabulario = list(self._vocabulario)
+        otra._postings = self._cow_postings.compartir(self._postings)
+        otra._trigramas = self._cow_trigramas.compartir(self._trigramas)
+        otra._documentos = dict(self._documentos)
+        return otra
+
+    def agregar(self, nombre, datos):
+        # Indexa (o reindexa) un perfil
+        self.eliminar(nombre)
+        pesos = {}
+        campos = dict(datos, nombre=nombre)
+        for campo, peso in PESOS_CAMPOS.items():
+            valor = campos.get(campo) or ""
+            textos = valor if isinstance(valor, (list, tuple)) else [valor]
+            for texto in textos:
+                for token in tokenizar(texto):
+                    pesos[token] = max(pesos.get(token, 0), peso)
+        for token, peso in pesos.items():
+            if token not in self._postings:
+                insort(self._vocabulario, token)
+                for trigrama in trigramas(token):
+                    self._cow_trigramas.modificable(self._trigramas, trigrama, set).add(token)
+            self._cow_postings.modificable(self._postings, token)[nombre] = peso
+        self._documentos[nombre] = set(pesos)
+
+    def eliminar(self, nombre):
+        for token in self._documentos.pop(nombre, ()):
+            documentos = self._cow_postings.modificable(self._postings, token)
+            del documentos[nombre]
+            if not documentos:
+                # El token ya no aparece en ningún perfil: se retira del vocabulario
+                del self._postings[token]
+                del self._vocabulario[bisect_left(self._vocabulario, token)]
+                for trigrama in trigramas(token):
+                    tokens = self._cow_trigramas.modificable(self._trigramas, trigrama, set)
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigramas[trigrama]
+
+    def _coincidencias(self, token_consulta):
+        # Tokens del vocabulario que coinciden con el de la consulta y con qué intensidad (0..1]
+        coincidencias = {}
+        inicio = bisect_left(self._vocabulario, token_consulta)
+        for token in self._vocabulario[inicio:inicio + self.max_expansiones]:
+            if not token.startswith(token_consulta):
+                break
+            coincidencias[token] = 1.0 if token == token_consulta else 0.8
+        # Los trigramas solo se usan como respaldo, cuando la palabra no es prefijo de nada (error de tipeo)
+        if not coincidencias and len(token_consulta) >= 3:
+            propios = trigramas(token_consulta)
+            conteos = {}
+            for trigrama in propios:
+                for token in self._trigramas.get(trigrama, ()):
+                    conteos[token] = conteos.get(token, 0) + 1
+            for token, comunes in conteos.items():
+                similitud = comunes / (len(propios) + len(trigramas(token)) - comunes)
+                if similitud >= self.similitud_minima:
+                    coincidencias[token] = 0.6 * similitud
+        return coincidencias
+
+    def buscar(self, consulta, k=10):
+        # Los k perfiles mejor puntuados para la consulta, de mayor a menor
+        puntajes = {}
+        for token_consulta in tokenizar(consulta):
+            mejores = {}
+            for token, intensidad in self._coincidencias(token_consulta).items():
+                for nombre, peso in self._postings[token].items():
+                    mejores[nombre] = max(mejores.get(nombre, 0), intensidad * peso)
+            # Cada palabra de la consulta aporta una sola vez por perfil
+            for nombre, puntaje in mejores.items():
+                puntajes[nombre] = puntajes.get(nombre, 0) + puntaje
+        return [nombre for nombre, _ in heapq.nlargest(k, puntajes.items(), key=lambda par: (par[1], par[0]))]
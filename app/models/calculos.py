@@ -0,0 +1,208 @@
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import instrumentacion
+
+# Lo que ve la interfaz de un cálculo: el último resultado bueno (puede ser de una versión anterior),
+# la versión a la que corresponde, si ya está al día y el avance del cálculo en curso
+EstadoCalculo = namedtuple("EstadoCalculo", ["valor", "version", "listo", "progreso", "mensaje", "error"])
+
+
+class Trabajo:
+    # Un cálculo enviado al pool; la función lo recibe para informar su avance
+
+    def __init__(self, version, ciclo=0, instrumentar=False):
+        self.version = version
+        self.ciclo = ciclo  # Rerun que lo pidió: sus mediciones se anotan ahí
+        self.instrumentar = instrumentar  # Si la sesión que lo pidió tiene la instrumentación encendida
+        self.futuro = None
+        self.progreso = 0.0
+        self.mensaje = ""
+
+    def avanzar(self, hechas, total, mensaje=""):
+        self.progreso = hechas / total if total else 1.0
+        self.mensaje = mensaje
+
+
+class ServicioCalculo:
+    # Ejecuta los cálculos costosos de un SocialGraph en hilos de fondo sobre instantáneas del grafo,
+    # así la página no se congela mientras corren. Cada cálculo se identifica por (nombre, argumentos)
+    # y se deduplica por versión del grafo: mientras uno está en curso no se encola otro igual.
+    # Todos los cálculos de una versión comparten una sola instantánea; `instantanea` es quien la entrega
+    # (p. ej. GrafoCompartido.instantanea, la misma que ven los lectores). Con un cerrojo de
+    # lectores/escritor (grafo compartido entre sesiones) las instantáneas se toman como lectura y la
+    # adopción de cachés como escritura, sin esperar nunca: si hay un escritor trabajando se reintenta
+    # en la próxima consulta
+
+    def __init__(self, graph, hilos=2, cerrojo=None, capacidad=64, instantanea=None):
+        self.graph = graph
+        self.cerrojo = cerrojo
+        self.capacidad = capacidad  # Resultados y errores que se conservan (los menos usados se descartan)
+        self._instantanea = instantanea or self._publicar
+        self._publicada = None  # Instantánea de la última versión cuando nadie más las publica
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="calculo")
+        self._lock = threading.Lock()
+        self._trabajos = {}  # (nombre, args) -> Trabajo más reciente
+        self._resultados = OrderedDict()  # (nombre, args) -> (versión, valor) del último cálculo terminado
+        self._errores = OrderedDict()  # (nombre, args) -> (versión, mensaje)
+        self._por_adoptar = {}  # versión -> instantánea terminada cuyas cachés aún no se adoptaron
+
+    def solicitar(self, nombre, funcion, *args):
+        # Pide `funcion(instantanea, trabajo, *args)` para la versión actual del grafo y devuelve un
+        # EstadoCalculo sin esperar. Las instantáneas se obtienen y sus cachés se adoptan aquí, en el hilo
+        # de quien consulta, nunca en los hilos de fondo
+        llave = (nombre, args)
+        version = self.graph.version
+        with self._lock:
+            self._recoger()
+            ultimo = self._resultados.get(llave)
+            if ultimo is not None:
+                self._resultados.move_to_end(llave)
+            error = self._errores.get(llave)
+            trabajo = self._trabajos.get(llave)
+        fallido = error is not None and error[0] == version
+        if (ultimo is None or ultimo[0] != version) and not fallido and trabajo is None:
+            # Fuera del lock del servicio: obtener la instantánea no frena las consultas de otras sesiones
+            instantanea = self._instantanea()
+            if instantanea is not None:
+                with self._lock:
+                    trabajo = self._trabajos.get(llave)
+                    reciente = self._resultados.get(llave)
+                    if trabajo is None and (reciente is None or reciente[0] < instantanea.version):
+                        trabajo = Trabajo(instantanea.version, instrumentacion.ciclo_actual(),
+                                          instrumentacion.esta_activa())
+                        trabajo.futuro = self._pool.submit(_ejecutar, funcion, instantanea, trabajo, args)
+                        self._trabajos[llave] = trabajo
+        valor, version_valor = (ultimo[1], ultimo[0]) if ultimo else (None, None)
+        return EstadoCalculo(
+            valor=valor,
+            version=version_valor,
+            listo=version_valor == version,
+            progreso=trabajo.progreso if trabajo else 1.0,
+            mensaje=trabajo.mensaje if trabajo else "",
+            error=error[1] if fallido else None,
+        )
+
+    def _publicar(self):
+        # Sin un grafo compartido que las publique: una instantánea por versión para todos los cálculos
+        publicada = self._publicada
+        if publicada is not None and publicada.version == self.graph.version:
+            return publicada
+        if self.cerrojo is not None and not self.cerrojo.adquirir_lectura(bloquear=False):
+            return None  # Hay un escritor trabajando: se reintenta en la próxima consulta
+        try:
+            self._publicada = self.graph.instantanea()
+        finally:
+            if self.cerrojo is not None:
+                self.cerrojo.liberar_lectura()
+        return self._publicada
+
+    def _recoger(self):
+        # Guarda el resultado de todos los trabajos terminados (no solo el de la llave consultada: nadie
+        # volverá a pedir una versión vieja o una vista abandonada) y adopta las cachés que calcularon
+        for llave, trabajo in list(self._trabajos.items()):
+            if not trabajo.futuro.done():
+                continue
+            del self._trabajos[llave]
+            try:
+                instantanea, valor = trabajo.futuro.result()
+            except Exception as error:
+                self._guardar(self._errores, llave, (trabajo.version, str(error)))
+                continue
+            ultimo = self._resultados.get(llave)
+            if ultimo is None or ultimo[0] <= trabajo.version:
+                self._guardar(self._resultados, llave, (trabajo.version, valor))
+            self._por_adoptar[instantanea.version] = instantanea
+        if not self._por_adoptar:
+            return
+        if self.cerrojo is not None and not self.cerrojo.adquirir_escritura(bloquear=False):
+            return  # Hay lectores o un escritor: se adopta en la próxima consulta
+        try:
+            for version in sorted(self._por_adoptar):
+                self.graph.adoptar(self._por_adoptar[version])
+            self._por_adoptar.clear()
+        finally:
+            if self.cerrojo is not None:
+                self.cerrojo.liberar_escritura()
+
+    def _guardar(self, registro, llave, valor):
+        # LRU acotada: p. ej. hay unas sugerencias por cada perfil consultado
+        registro[llave] = valor
+        registro.move_to_end(llave)
+        while len(registro) > self.capacidad:
+            registro.popitem(last=False)
+
+    def ocupado(self, llaves=None):
+        # Hay cálculos todavía corriendo; con `llaves` ((nombre, args) como en solicitar) solo cuentan esos,
+        # así una sesión no espera los cálculos que pidieron otras
+        with self._lock:
+            return any(not trabajo.futuro.done() for llave, trabajo in self._trabajos.items()
+                       if llaves is None or llave in llaves)
+
+    def cerrar(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _ejecutar(funcion, instantanea, trabajo, args):
+    instrumentacion.fijar_ciclo(trabajo.ciclo)
+    instrumentacion.activar_hilo(trabajo.instrumentar)
+    return funcion(instantanea, trabajo, *args)
+
+
+# ----- Cálculos disponibles: reciben la instantánea y el trabajo y devuelven (instantanea, valor) -----
+
+def calcular_red(graph, trabajo, tamano_por=None):
+    # Dibujo principal de la red; con tamano_por los nodos se escalan por esa centralidad. draw_graph decide
+    # qué necesita: sobre el umbral de supernodos no calcula el layout completo ni la centralidad
+    trabajo.avanzar(0, 1, "Dibujando la red")
+    return graph, graph.draw_graph_png(leyenda_tipos=True, tamano_por=tamano_por)
+
+
+def calcular_comunidades(graph, trabajo, nivel=None, interes_seleccionado=""):
+    # Detección con varias semillas, comunidades nombradas y dibujo del nivel pedido (None: el más grueso)
+    resultado = graph.comunidades_estables(
+        progreso=lambda hechas, total: trabajo.avanzar(hechas, total + 1, "Detectando comunidades")
+    )
+    if nivel is None:
+        nivel = len(resultado["dendrograma"]) - 1
+    trabajo.avanzar(1, 1, "Dibujando comunidades")
+    comunidades, _ = graph.detect_communities(nivel=nivel, interes_seleccionado=interes_seleccionado)
+    png = graph.draw_graph_png(communities=True, nivel_comunidades=nivel, interes_seleccionado=interes_seleccionado)
+    return graph, {"resultado": resultado, "nivel": nivel, "comunidades": comunidades, "png": png}
+
+
+def calcular_filtrado(graph, trabajo, intereses, modo="or", interes_seleccionado=""):
+    # Vista filtrada por intereses (None si ningún perfil coincide)
+    trabajo.avanzar(0, 1, "Filtrando la red")
+    return graph, graph.buscar_y_filtrar(list(intereses), modo, interes_seleccionado)
+
+
+def calcular_red_simple(graph, trabajo):
+    # Red completa sin leyenda ni filtros (la que muestra "Restablecer Búsqueda")
+    trabajo.avanzar(0, 1, "Dibujando la red")
+    return graph, graph.draw_graph_png()
+
+
+def calcular_sugerencias(graph, trabajo, nombre, k=5):
+    # Sugerencias de colaboración con los grados de separación aproximados
+    trabajo.avanzar(0, 1, "Buscando colaboradores")
+    return graph, [
+        (sugerido, puntaje, graph.distancia_aproximada(nombre, sugerido))
+        for sugerido, puntaje in graph.recomendar(nombre, k)
+    ]
+
+
+def calcular_centralidad(graph, trabajo, medida="pagerank", por=None, k=10):
+    # Ranking de los perfiles más centrales (desglosado por grupo si se pide) y la precisión de la estimación
+    resultado = graph.centralidad(
+        progreso=lambda hechas, total: trabajo.avanzar(hechas, total + 1, "Estimando la intermediación")
+    )
+    trabajo.avanzar(1, 1, "Armando el ranking")
+    return graph, {
+        "ranking": graph.ranking_centralidad(medida, k, por),
+        "muestras": resultado["muestras"],
+        "error": resultado["error"],
+        "confianza": resultado["confianza"],
+        "exacta": resultado["exacta"],
+    }
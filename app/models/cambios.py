@@ -0,0 +1,53 @@
+from collections import deque, namedtuple
+from itertools import islice
+
+# Un cambio del grafo: versión resultante, tipo de operación, nodo o arista afectada y datos extra
+# (perfil anterior en actualizaciones/eliminaciones de nodos, peso en las aristas)
+Cambio = namedtuple("Cambio", ["version", "tipo", "clave", "datos"])
+
+NODO_AGREGADO = "nodo_agregado"
+NODO_ACTUALIZADO = "nodo_actualizado"
+NODO_ELIMINADO = "nodo_eliminado"
+ARISTA_AGREGADA = "arista_agregada"
+ARISTA_ACTUALIZADA = "arista_actualizada"
+ARISTA_ELIMINADA = "arista_eliminada"
+
+
+class RegistroCambios:
+    # Historial versionado de cambios del grafo; las cachés se suscriben para invalidarse con precisión
+
+    def __init__(self, capacidad=10000):
+        self.version = 0
+        self._cambios = deque(maxlen=capacidad)  # Solo se conservan los cambios más recientes
+        self._suscriptores = []
+
+    def suscribir(self, funcion):
+        # La función recibe cada Cambio justo después de aplicarse en el grafo
+        self._suscriptores.append(funcion)
+
+    def registrar(self, tipo, clave, datos=None):
+        self.version += 1
+        cambio = Cambio(self.version, tipo, clave, datos)
+        self._cambios.append(cambio)
+        for funcion in self._suscriptores:
+            funcion(cambio)
+        return cambio
+
+    def desde(self, version):
+        # Cambios pendientes posteriores a `version`; None si ya salieron del historial
+        # (en ese caso quien consulta debe resincronizarse por completo)
+        if version >= self.version:
+            return []
+        if not self._cambios or self._cambios[0].version > version + 1:
+            return None
+        inicio = version + 1 - self._cambios[0].version
+        return list(islice(self._cambios, inicio, None))
+
+
+def nodos_estructurales(cambio):
+    # Nodos cuya estructura (vecindario o existencia) cambió; actualizar solo el perfil no cuenta
+    if cambio.tipo == NODO_ACTUALIZADO:
+        return ()
+    if cambio.tipo in (NODO_AGREGADO, NODO_ELIMINADO):
+        return (cambio.clave,)
+    return cambio.clave
@@ -0,0 +1,195 @@
+import heapq
+import math
+import time
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components, shortest_path
+
+MEDIDAS = ("grado", "pagerank", "intermediacion")
+
+
+def centralidad_grado(csr):
+    # Fracción de los demás perfiles con los que colabora cada uno
+    n = len(csr)
+    return csr.grados() / (n - 1) if n > 1 else np.zeros(n)
+
+
+def pagerank(csr, amortiguacion=0.85, tolerancia=1e-6, max_iteraciones=100):
+    # PageRank por iteración de potencias sobre la matriz de pesos (las colaboraciones repetidas pesan más).
+    # La matriz es simétrica, así que W @ x equivale a Wᵀ @ x. Devuelve (valores, iteraciones)
+    n = len(csr)
+    if n == 0:
+        return np.zeros(0), 0
+    W = sparse.csr_matrix((csr.pesos.astype(np.float64), csr.indices, csr.indptr), shape=(n, n))
+    salida = csr.grados_ponderados()
+    colgantes = salida == 0  # Perfiles sin colaboraciones: reparten su peso entre todos
+    inverso = np.zeros(n)
+    inverso[~colgantes] = 1 / salida[~colgantes]
+    x = np.full(n, 1 / n)
+    for iteracion in range(1, max_iteraciones + 1):
+        anterior = x
+        x = amortiguacion * (W @ (x * inverso)) + (amortiguacion * x[colgantes].sum() + 1 - amortiguacion) / n
+        # Mismo criterio de convergencia que networkx
+        if np.abs(x - anterior).sum() < n * tolerancia:
+            break
+    return x, iteracion
+
+
+def diametro_vertices(csr):
+    # Cota superior de la cantidad de nodos del camino mínimo más largo: en la componente más grande
+    # se usa 2·excentricidad + 1 desde su nodo de mayor grado; en las demás basta su tamaño
+    n = len(csr)
+    if n == 0:
+        return 0
+    A = sparse.csr_matrix((np.ones(len(csr.indices)), csr.indices, csr.indptr), shape=(n, n))
+    _, etiquetas = connected_components(A, directed=False)
+    tamanos = np.bincount(etiquetas)
+    orden = np.argsort(tamanos)[::-1]
+    mayor = orden[0]
+    miembros = np.flatnonzero(etiquetas == mayor)
+    centro = miembros[np.argmax(csr.grados()[miembros])]
+    excentricidad = shortest_path(A, unweighted=True, indices=centro)[miembros].max()
+    cota = min(2 * int(excentricidad) + 1, int(tamanos[mayor]))
+    return max(cota, int(tamanos[orden[1]]) if len(orden) > 1 else 0)
+
+
+def muestras_necesarias(error, confianza, diametro, c=0.5):
+    # Tamaño de muestra de Riondato y Kornaropoulos: con esa cantidad de pares, todas las estimaciones
+    # quedan a menos de `error` de la intermediación real con probabilidad `confianza`
+    return math.ceil(c / error ** 2 * (_termino_vc(diametro) + math.log(1 / (1 - confianza))))
+
+
+def _termino_vc(diametro):
+    return math.floor(math.log2(diametro - 2)) + 1 if diametro > 3 else 1
+
+
+class _Caminos:
+    # BFS por niveles vectorizado que cuenta caminos mínimos; los arreglos se reutilizan entre muestras
+    # y solo se limpian los nodos visitados
+
+    def __init__(self, csr):
+        self.csr = csr
+        self.distancia = np.full(len(csr), -1, dtype=np.int64)
+        self.sigma = np.zeros(len(csr))
+
+    def muestrear(self, origen, destino, aleatorio):
+        # Nodos internos de un camino mínimo origen-destino elegido al azar entre todos los mínimos
+        # (lista vacía si no hay camino o son vecinos)
+        csr, distancia, sigma = self.csr, self.distancia, self.sigma
+        frontera = np.array([origen], dtype=np.int64)
+        distancia[origen], sigma[origen] = 0, 1.0
+        visitados = [frontera]
+        nivel = 0
+        # Se detiene al completar el nivel del destino: no hace falta recorrer toda la red
+        while distancia[destino] < 0:
+            largos = csr.indptr[frontera + 1] - csr.indptr[frontera]
+            vecinos = csr.expandir(frontera)
+            padres = np.repeat(frontera, largos)
+            nuevos = distancia[vecinos] < 0
+            if not nuevos.any():
+                break
+            vecinos, padres = vecinos[nuevos], padres[nuevos]
+            nivel += 1
+            frontera, inverso = np.unique(vecinos, return_inverse=True)
+            distancia[frontera] = nivel
+            sigma[frontera] = np.bincount(inverso, weights=sigma[padres])
+            visitados.append(frontera)
+
+        internos = []
+        if distancia[destino] > 1:
+            # Se retrocede eligiendo cada predecesor con probabilidad proporcional a sus caminos mínimos
+            nodo = destino
+            while distancia[nodo] > 1:
+                vecinos = csr.indices[csr.indptr[nodo]:csr.indptr[nodo + 1]]
+                previos = vecinos[distancia[vecinos] == distancia[nodo] - 1]
+                acumulado = np.cumsum(sigma[previos])
+                nodo = int(previos[np.searchsorted(acumulado, aleatorio.random() * acumulado[-1], side="right")])
+                internos.append(nodo)
+
+        tocados = np.concatenate(visitados)
+        distancia[tocados] = -1
+        sigma[tocados] = 0.0
+        return internos
+
+
+def intermediacion_aproximada(csr, error=0.05, confianza=0.9, tiempo_max=None, semilla=42, progreso=None):
+    # Intermediación normalizada (misma escala que networkx) estimada muestreando pares de perfiles y un
+    # camino mínimo al azar entre ellos. Si el tiempo se agota antes de completar la muestra se devuelve lo
+    # que haya, con la cota de error que corresponde a las muestras tomadas.
+    # Devuelve (valores, {"muestras", "error", "confianza", "exacta"})
+    n = len(csr)
+    if n < 3:
+        return np.zeros(n), {"muestras": 0, "error": 0.0, "confianza": 1.0, "exacta": True}
+    diametro = diametro_vertices(csr)
+    objetivo = muestras_necesarias(error, confianza, diametro)
+    if objetivo >= n * (n - 1):
+        # Red pequeña: recorrer todos los pares es más barato que muestrear
+        return _intermediacion_exacta(csr), {"muestras": n * (n - 1), "error": 0.0, "confianza": 1.0, "exacta": True}
+
+    aleatorio = np.random.default_rng(semilla)
+    caminos = _Caminos(csr)
+    conteos = np.zeros(n)
+    limite = time.perf_counter() + tiempo_max if tiempo_max else None
+    aviso = max(1, objetivo // 100)
+    tomadas = 0
+    while tomadas < objetivo:
+        origen, destino = aleatorio.choice(n, size=2, replace=False)
+        for nodo in caminos.muestrear(origen, destino, aleatorio):
+            conteos[nodo] += 1
+        tomadas += 1
+        if progreso and tomadas % aviso == 0:
+            progreso(tomadas, objetivo)
+        if limite is not None and time.perf_counter() > limite:
+            break
+
+    # Error garantizado con las muestras tomadas (no mayor que el pedido si se completó la muestra)
+    alcanzado = math.sqrt(0.5 * (_termino_vc(diametro) + math.log(1 / (1 - confianza))) / tomadas)
+    valores = conteos / tomadas * n / (n - 2)
+    return valores, {"muestras": tomadas, "error": alcanzado, "confianza": confianza, "exacta": False}
+
+
+def _intermediacion_exacta(csr):
+    exacta = nx.betweenness_centrality(csr.a_networkx(), normalized=True)
+    return np.array([exacta[nombre] for nombre in csr.nombres])
+
+
+def centralidades(csr, error=0.05, confianza=0.9, tiempo_max=None, progreso=None):
+    # Las tres medidas para todos los perfiles, en el orden de csr.nombres
+    valores_pagerank, iteraciones = pagerank(csr)
+    intermediacion, estimacion = intermediacion_aproximada(csr, error, confianza, tiempo_max, progreso=progreso)
+    return {
+        "nombres": csr.nombres,
+        "grado": centralidad_grado(csr),
+        "pagerank": valores_pagerank,
+        "intermediacion": intermediacion,
+        "iteraciones_pagerank": iteraciones,
+        **estimacion,
+    }
+
+
+def mas_centrales(nombres, valores, k=10, indices=None):
+    # Los k de mayor valor, de mayor a menor: [(nombre, valor)]
+    if indices is None:
+        indices = range(len(nombres))
+    mejores = heapq.nlargest(k, indices, key=lambda i: valores[i])
+    return [(nombres[i], float(valores[i])) for i in mejores]
+
+
+def desglosar(nombres, valores, grupos, k=5):
+    # Resumen por grupo (tipo, facultad, comunidad...): {grupo: {"miembros", "media", "maximo", "top"}},
+    # ordenado por el valor máximo de cada grupo
+    indices = {}
+    for i, grupo in enumerate(grupos):
+        indices.setdefault(grupo, []).append(i)
+    resumen = {}
+    for grupo, miembros in indices.items():
+        propios = valores[miembros]
+        resumen[grupo] = {
+            "miembros": len(miembros),
+            "media": float(propios.mean()),
+            "maximo": float(propios.max()),
+            "top": mas_centrales(nombres, valores, k, miembros),
+        }
+    return dict(sorted(resumen.items(), key=lambda par: par[1]["maximo"], reverse=True))
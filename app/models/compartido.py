@@ -0,0 +1,104 @@
+import threading
+from contextlib import contextmanager
+
+from models.calculos import ServicioCalculo
+
+
+class CerrojoLectoresEscritor:
+    # Muchos lectores a la vez o un solo escritor; los escritores en espera tienen prioridad
+    # para que un flujo constante de lecturas no los deje esperando indefinidamente
+
+    def __init__(self):
+        self._condicion = threading.Condition()
+        self._lectores = 0
+        self._escribiendo = False
+        self._escritores_esperando = 0
+
+    def adquirir_lectura(self, bloquear=True):
+        with self._condicion:
+            while self._escribiendo or self._escritores_esperando:
+                if not bloquear:
+                    return False
+                self._condicion.wait()
+            self._lectores += 1
+            return True
+
+    def liberar_lectura(self):
+        with self._condicion:
+            self._lectores -= 1
+            if not self._lectores:
+                self._condicion.notify_all()
+
+    def adquirir_escritura(self, bloquear=True):
+        with self._condicion:
+            if not bloquear:
+                if self._escribiendo or self._lectores:
+                    return False
+                self._escribiendo = True
+                return True
+            self._escritores_esperando += 1
+            while self._escribiendo or self._lectores:
+                self._condicion.wait()
+            self._escritores_esperando -= 1
+            self._escribiendo = True
+            return True
+
+    def liberar_escritura(self):
+        with self._condicion:
+            self._escribiendo = False
+            self._condicion.notify_all()
+
+    @contextmanager
+    def lectura(self):
+        self.adquirir_lectura()
+        try:
+            yield
+        finally:
+            self.liberar_lectura()
+
+    @contextmanager
+    def escritura(self):
+        self.adquirir_escritura()
+        try:
+            yield
+        finally:
+            self.liberar_escritura()
+
+
+class GrafoCompartido:
+    # Un único SocialGraph por proceso, compartido por todas las sesiones. Los escritores modifican el
+    # grafo vivo con el cerrojo de escritura; los lectores reciben una instantánea inmutable de la última
+    # versión publicada, que se toma una sola vez por versión y se reparte entre todas las sesiones.
+    # Los cálculos costosos pasan por un único servicio que trabaja sobre esa misma instantánea, así que
+    # sus cachés también son comunes
+
+    def __init__(self, graph, almacen, hilos=2):
+        self.graph = graph
+        self.almacen = almacen
+        self.cerrojo = CerrojoLectoresEscritor()
+        self.servicio = ServicioCalculo(graph, hilos, cerrojo=self.cerrojo, instantanea=self.instantanea)
+        self._publicada = None  # (versión, instantánea) que ven los lectores
+        self._lock_publicacion = threading.Lock()
+
+    @contextmanager
+    def escribir(self):
+        # `with compartido.escribir() as graph:` da acceso exclusivo al grafo vivo
+        with self.cerrojo.escritura():
+            yield self.graph
+
+    def instantanea(self):
+        # Vista de solo lectura de la última versión. Si un escritor está trabajando (p. ej. una importación
+        # larga) no se espera: se devuelve la última versión publicada
+        publicada = self._publicada
+        if publicada is not None and publicada[0] == self.graph.version:
+            return publicada[1]
+        if not self.cerrojo.adquirir_lectura(bloquear=publicada is None):
+            return publicada[1]
+        try:
+            with self._lock_publicacion:
+                # Otra sesión pudo publicar esta misma versión mientras se esperaba
+                if self._publicada is None or self._publicada[0] != self.graph.version:
+                    self._publicada = (self.graph.version, self.graph.instantanea())
+                return self._publicada[1]
+        finally:
+            self.cerrojo.liberar_lectura()
@@ -0,0 +1,262 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from models.cambios import nodos_estructurales
+from utils.instrumentacion import registrar_cache
+
+
+class CacheParticiones:
+    # Guarda la partición de Louvain por resolución y la actualiza localmente cuando cambian pocas aristas
+
+    def __init__(self, umbral_deriva=0.02, semilla=42):
+        # Si la modularidad cae más que este umbral respecto al último cálculo completo, se recalcula todo
+        self.umbral_deriva = umbral_deriva
+        self.semilla = semilla  # Semilla fija para que el resultado no cambie entre clics
+        self._entradas = {}  # resolucion -> {"version", "particion", "modularidad", "pendientes"}
+
+    def marcar(self, *nodos):
+        # Registra nodos tocados por un cambio; cada resolución los atenderá en su próxima consulta
+        for entrada in self._entradas.values():
+            entrada["pendientes"].update(nodos)
+
+    def al_cambiar(self, cambio):
+        # Suscriptor del historial de cambios del grafo
+        self.marcar(*nodos_estructurales(cambio))
+
+    def copia(self):
+        # Copia independiente; las particiones guardadas se reemplazan y nunca se modifican, así que se comparten
+        otra = CacheParticiones(self.umbral_deriva, self.semilla)
+        otra._entradas = {resolucion: dict(entrada, pendientes=set(entrada["pendientes"]))
+                          for resolucion, entrada in self._entradas.items()}
+        return otra
+
+    def combinar(self, otra, posteriores):
+        # Toma de otra caché las entradas más recientes que las propias y les marca los cambios posteriores
+        # (sobre una copia de la entrada: la otra caché puede seguir en uso, p. ej. en una instantánea publicada)
+        for resolucion, entrada in list(otra._entradas.items()):
+            propia = self._entradas.get(resolucion)
+            if propia is None or propia["version"] < entrada["version"]:
+                entrada = dict(entrada, pendientes=set(entrada["pendientes"]))
+                for cambio in posteriores:
+                    entrada["pendientes"].update(nodos_estructurales(cambio))
+                self._entradas[resolucion] = entrada
+
+    def obtener(self, G, version, resolucion=1.0):
+        # Devuelve la partición {nodo: id_comunidad} para la versión indicada del grafo
+        entrada = self._entradas.get(resolucion)
+        vigente = entrada is not None and entrada["version"] == version
+        registrar_cache("CacheParticiones", vigente)
+        if vigente:
+            return entrada["particion"]
+
+        if entrada is None:
+            particion, modularidad = self._calcular_completo(G, resolucion)
+        else:
+            particion = self._actualizar_local(G, entrada["particion"], entrada["pendientes"], resolucion)
+            modularidad = modularidad_segura(particion, G)
+            # Las actualizaciones locales acumulan error; si la calidad se degrada se recalcula todo
+            if entrada["modularidad"] - modularidad > self.umbral_deriva:
+                particion, modularidad = self._calcular_completo(G, resolucion)
+            else:
+                modularidad = entrada["modularidad"]  # Se conserva la referencia del último cálculo completo
+
+        self._entradas[resolucion] = {
+            "version": version,
+            "particion": particion,
+            "modularidad": modularidad,
+            "pendientes": set(),
+        }
+        return particion
+
+    def _calcular_completo(self, G, resolucion):
+        # python-louvain se importa al usarlo: quien no detecta comunidades no paga su carga
+        import community as community_louvain
+
+        particion = community_louvain.best_partition(G, resolution=resolucion, random_state=self.semilla)
+        return particion, modularidad_segura(particion, G)
+
+    def _actualizar_local(self, G, anterior, pendientes, resolucion):
+        # Parte de la partición anterior sin los nodos eliminados
+        particion = {nodo: comunidad for nodo, comunidad in anterior.items() if nodo in G}
+        pendientes = {nodo for nodo in pendientes if nodo in G}
+        if not pendientes:
+            return particion
+
+        # Zona a reoptimizar: las comunidades tocadas por el cambio más los nodos nuevos
+        tocadas = {particion[nodo] for nodo in pendientes if nodo in particion}
+        zona = {nodo for nodo, comunidad in particion.items() if comunidad in tocadas} | pendientes
+
+        # Louvain sobre la zona, arrancando desde la partición previa (los nodos nuevos empiezan solos)
+        siguiente_id = max(particion.values(), default=-1) + 1
+        inicial = {}
+        for nodo in zona:
+            if nodo in particion:
+                inicial[nodo] = particion[nodo]
+            else:
+                inicial[nodo] = siguiente_id
+                siguiente_id += 1
+        subgrafo = G.subgraph(zona)
+        if subgrafo.number_of_edges() > 0:
+            import community as community_louvain
+
+            local = community_louvain.best_partition(
+                subgrafo, partition=inicial, resolution=resolucion, random_state=self.semilla
+            )
+        else:
+            local = {nodo: i for i, nodo in enumerate(zona)}
+
+        # Los ids locales se desplazan para no chocar con las comunidades que no se tocaron
+        for nodo, comunidad in local.items():
+            particion[nodo] = siguiente_id + comunidad
+        return renumerar(particion)
+
+
+def modularidad_segura(particion, G):
+    # La modularidad no está definida para grafos sin aristas
+    if G.number_of_edges() == 0:
+        return 0.0
+    import community as community_louvain
+
+    return community_louvain.modularity(particion, G)
+
+
+def renumerar(particion):
+    # Deja los ids de comunidad consecutivos desde 0
+    ids = {}
+    return {nodo: ids.setdefault(comunidad, len(ids)) for nodo, comunidad in particion.items()}
+
+
+# ----- Detección con varias semillas y resoluciones -----
+
+_GRAFO_TRABAJADOR = None  # Grafo que cada proceso del pool recibe una sola vez al iniciar
+
+
+def _contexto_procesos():
+    # El pool se crea desde hilos de Streamlit o del servicio de cálculo: hacer fork de un proceso con
+    # varios hilos puede copiar cerrojos tomados por otros hilos y bloquear a los hijos. forkserver
+    # (o spawn donde no existe) arranca los procesos desde un intérprete limpio
+    metodos = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in metodos else "spawn")
+
+
+def _iniciar_trabajador(nodos, aristas):
+    global _GRAFO_TRABAJADOR
+    _GRAFO_TRABAJADOR = nx.Graph()
+    _GRAFO_TRABAJADOR.add_nodes_from(nodos)
+    _GRAFO_TRABAJADOR.add_weighted_edges_from(aristas)
+
+
+def _louvain_trabajador(tarea):
+    return _louvain(_GRAFO_TRABAJADOR, *tarea)
+
+
+def _louvain(G, semilla, resolucion):
+    # Una corrida completa: dendrograma (del nivel más fino al más grueso) y modularidad de su último nivel
+    import community as community_louvain
+
+    dendrograma = community_louvain.generate_dendrogram(G, resolution=resolucion, random_state=semilla)
+    particion = community_louvain.partition_at_level(dendrograma, len(dendrograma) - 1)
+    return dendrograma, modularidad_segura(particion, G)
+
+
+def deteccion_multiple(G, semillas=8, resoluciones=(1.0,), consenso=False, procesos=None, progreso=None):
+    # Corre Louvain con varias semillas y resoluciones en un pool de procesos y se queda con la partición de
+    # mayor modularidad (o con la de consenso). Las semillas son fijas, así que el resultado es reproducible.
+    # Devuelve un diccionario con la partición, su modularidad, la estabilidad entre semillas (NMI medio)
+    # y el dendrograma de la mejor corrida para recorrer niveles sin recalcular.
+    # `progreso(hechas, total)` se llama cada vez que termina una corrida
+    import community as community_louvain
+
+    tareas = [(semilla, resolucion) for resolucion in resoluciones for semilla in range(semillas)]
+    if procesos == 1 or len(tareas) == 1:
+        corridas = []
+        for semilla, resolucion in tareas:
+            corridas.append(_louvain(G, semilla, resolucion))
+            if progreso:
+                progreso(len(corridas), len(tareas))
+    else:
+        # La red viaja como listas de nodos y aristas, una vez por proceso y no una vez por tarea
+        aristas = [(nodo1, nodo2, datos.get("weight", 1)) for nodo1, nodo2, datos in G.edges(data=True)]
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=_contexto_procesos(), initializer=_iniciar_trabajador,
+                                 initargs=(list(G), aristas)) as pool:
+            futuros = [pool.submit(_louvain_trabajador, tarea) for tarea in tareas]
+            for hechas, _ in enumerate(as_completed(futuros), 1):
+                if progreso:
+                    progreso(hechas, len(tareas))
+            corridas = [futuro.result() for futuro in futuros]
+
+    # Ante empates gana la primera corrida, para que el resultado no dependa del orden de llegada
+    mejor = max(range(len(corridas)), key=lambda i: (corridas[i][1], -i))
+    dendrograma, modularidad = corridas[mejor]
+    resolucion = tareas[mejor][1]
+    finales = [community_louvain.partition_at_level(d, len(d) - 1) for d, _ in corridas]
+    particion = finales[mejor]
+
+    # Las corridas con la misma resolución pero otra semilla miden qué tan estable es el resultado
+    hermanas = [finales[i] for i, (_, r) in enumerate(tareas) if r == resolucion and i != mejor]
+    if consenso:
+        hermanas = [finales[i] for i, (_, r) in enumerate(tareas) if r == resolucion]
+        particion = particion_consenso(G, hermanas)
+        modularidad = modularidad_segura(particion, G)
+    nodos = list(G)
+    etiquetas = np.array([particion[nodo] for nodo in nodos])
+    estabilidad = float(np.mean([
+        informacion_mutua_normalizada(etiquetas, np.array([otra[nodo] for nodo in nodos])) for otra in hermanas
+    ])) if hermanas else 1.0
+
+    return {
+        "particion": particion,
+        "modularidad": modularidad,
+        "estabilidad": estabilidad,
+        "dendrograma": dendrograma,
+        "semilla": tareas[mejor][0],
+        "resolucion": resolucion,
+    }
+
+
+def particion_nivel(resultado, nivel):
+    # Partición de un nivel del dendrograma (0 = comunidades más finas); el último nivel es la partición elegida
+    dendrograma = resultado["dendrograma"]
+    if nivel >= len(dendrograma) - 1:
+        return resultado["particion"]
+    import community as community_louvain
+
+    return community_louvain.partition_at_level(dendrograma, nivel)
+
+
+def particion_consenso(G, particiones, umbral=0.5):
+    # Matriz de coasociación restringida a las aristas: dos vecinos quedan juntos si compartieron
+    # comunidad en más de la mitad de las corridas; las comunidades son las componentes resultantes
+    nodos = list(G)
+    indice = {nodo: i for i, nodo in enumerate(nodos)}
+    aristas = np.array([(indice[u], indice[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+    etiquetas = np.array([[particion[nodo] for nodo in nodos] for particion in particiones])
+    juntos = (etiquetas[:, aristas[:, 0]] == etiquetas[:, aristas[:, 1]]).mean(axis=0) > umbral
+    n = len(nodos)
+    enlaces = sparse.coo_matrix((np.ones(juntos.sum()), (aristas[juntos, 0], aristas[juntos, 1])), shape=(n, n))
+    _, componentes = connected_components(enlaces, directed=False)
+    return renumerar(dict(zip(nodos, componentes.tolist())))
+
+
+def informacion_mutua_normalizada(a, b):
+    # NMI entre dos asignaciones de etiquetas (1 = idénticas salvo renombre, 0 = independientes)
+    n = len(a)
+    if n == 0:
+        return 1.0
+    _, a = np.unique(a, return_inverse=True)
+    _, b = np.unique(b, return_inverse=True)
+    pa = np.bincount(a) / n
+    pb = np.bincount(b) / n
+    base = b.max() + 1
+    pares, conteos = np.unique(a.astype(np.int64) * base + b, return_counts=True)
+    pab = conteos / n
+    informacion = np.sum(pab * np.log(pab / (pa[pares // base] * pb[pares % base])))
+    entropias = -np.sum(pa * np.log(pa)) - np.sum(pb * np.log(pb))
+    if entropias == 0:
+        return 1.0
+    return float(2 * informacion / entropias)
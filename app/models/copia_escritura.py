@@ -0,0 +1,22 @@
+class CopiaEnEscritura:
+    # Comparte entre un grafo y sus instantáneas los valores (dicts o sets) de un diccionario: la copia del
+    # diccionario externo es superficial y cada valor se duplica solo la primera vez que se modifica después
+    # de compartirlo. Así una instantánea cuesta O(llaves) punteros y no una copia profunda
+
+    def __init__(self):
+        self._propios = set()  # Llaves cuyo valor ya no comparte ninguna copia
+
+    def compartir(self, contenedor):
+        # Copia superficial de `contenedor`; desde ahora ningún valor es propio de ninguno de los dos lados
+        self._propios = set()
+        return dict(contenedor)
+
+    def modificable(self, contenedor, llave, nuevo=dict):
+        # Valor de `llave` que se puede modificar sin afectar a las copias (se crea con `nuevo` si no existe)
+        valor = contenedor.get(llave)
+        if valor is None:
+            valor = contenedor[llave] = nuevo()
+        elif llave not in self._propios:
+            valor = contenedor[llave] = valor.copy()
+        self._propios.add(llave)
+        return valor
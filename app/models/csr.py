@@ -0,0 +1,164 @@
+import networkx as nx
+import numpy as np
+
+
+class GrafoCSR:
+    # Representación compacta para analítica en redes grandes: los nombres se internan a ids
+    # enteros consecutivos, la adyacencia se guarda en arreglos CSR (indptr/indices/pesos) y los
+    # atributos de los nodos en columnas de NumPy
+
+    def __init__(self, nombres, indptr, indices, pesos, tipo, categorias_tipo, intereses, categorias_interes):
+        self.nombres = nombres  # Arreglo de objetos: id -> nombre
+        self.ids = {nombre: i for i, nombre in enumerate(nombres)}
+        self.indptr = indptr  # Los vecinos del nodo i están en indices[indptr[i]:indptr[i + 1]]
+        self.indices = indices
+        self.pesos = pesos
+        self.tipo = tipo  # Código entero por nodo (-1 si no tiene tipo)
+        self.categorias_tipo = categorias_tipo
+        self.intereses = intereses  # Matriz booleana (nodos x intereses) guardada por columnas
+        self.categorias_interes = categorias_interes
+        # Fila de cada posición de `indices` (el nodo de origen de cada arista dirigida)
+        self.filas = np.repeat(np.arange(len(nombres), dtype=indices.dtype), np.diff(indptr))
+
+    # ----- Construcción -----
+
+    @classmethod
+    def desde_datos(cls, nodos, aristas):
+        # nodos: iterable de (nombre, datos); aristas: iterable de (nodo1, nodo2, peso), cada una una sola vez
+        nombres = []
+        tipos = []
+        listas_intereses = []
+        for nombre, datos in nodos:
+            nombres.append(nombre)
+            tipos.append(datos.get("tipo"))
+            listas_intereses.append(datos.get("intereses") or ())
+        nombres = np.array(nombres, dtype=object)
+        ids = {nombre: i for i, nombre in enumerate(nombres)}
+
+        # Atributos en columnas: códigos para el tipo y una columna booleana por interés
+        categorias_tipo = sorted({t for t in tipos if t is not None})
+        codigos = {t: i for i, t in enumerate(categorias_tipo)}
+        tipo = np.fromiter((codigos.get(t, -1) for t in tipos), dtype=np.int8, count=len(tipos))
+        categorias_interes = sorted({i for lista in listas_intereses for i in lista})
+        columnas = {interes: i for i, interes in enumerate(categorias_interes)}
+        intereses = np.zeros((len(nombres), len(categorias_interes)), dtype=bool, order="F")
+        for nodo, lista in enumerate(listas_intereses):
+            for interes in lista:
+                intereses[nodo, columnas[interes]] = True
+
+        aristas = list(aristas)
+        origen = np.fromiter((ids[a] for a, _, _ in aristas), dtype=np.int64, count=len(aristas))
+        destino = np.fromiter((ids[b] for _, b, _ in aristas), dtype=np.int64, count=len(aristas))
+        peso = np.fromiter((p for _, _, p in aristas), dtype=np.float32, count=len(aristas))
+        indptr, indices, pesos = _csr(len(nombres), origen, destino, peso)
+        return cls(nombres, indptr, indices, pesos, tipo, categorias_tipo, intereses, categorias_interes)
+
+    @classmethod
+    def desde_social_graph(cls, graph):
+        return cls.desde_datos(graph.G.nodes(data=True), graph.aristas)
+
+    @classmethod
+    def desde_networkx(cls, G, weight="weight"):
+        return cls.desde_datos(G.nodes(data=True), ((a, b, d.get(weight, 1)) for a, b, d in G.edges(data=True)))
+
+    def a_networkx(self):
+        # Conversión para los algoritmos que todavía se usan desde networkx
+        G = nx.Graph()
+        for i, nombre in enumerate(self.nombres):
+            datos = {"intereses": [self.categorias_interes[c] for c in np.flatnonzero(self.intereses[i])]}
+            if self.tipo[i] >= 0:
+                datos["tipo"] = self.categorias_tipo[self.tipo[i]]
+            G.add_node(nombre, **datos)
+        # Cada arista aparece dos veces en CSR; se toma solo la orientación origen < destino
+        unica = self.filas < self.indices
+        G.add_weighted_edges_from(zip(
+            self.nombres[self.filas[unica]], self.nombres[self.indices[unica]], self.pesos[unica].tolist()
+        ))
+        return G
+
+    # ----- Consultas -----
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def numero_aristas(self):
+        return len(self.indices) // 2
+
+    def grados(self):
+        return np.diff(self.indptr)
+
+    def grados_ponderados(self):
+        return np.bincount(self.filas, weights=self.pesos, minlength=len(self))
+
+    def vecinos(self, nombre):
+        i = self.ids[nombre]
+        return self.nombres[self.indices[self.indptr[i]:self.indptr[i + 1]]].tolist()
+
+    def expandir(self, frontera):
+        # Vecinos (con repetición) de todos los ids de la frontera, sin bucles de Python
+        inicio = self.indptr[frontera]
+        largos = self.indptr[frontera + 1] - inicio
+        desplazamiento = np.repeat(inicio - np.cumsum(largos) + largos, largos)
+        return self.indices[desplazamiento + np.arange(largos.sum())]
+
+    def vecindario(self, nombres, radio=1):
+        # Máscara de los nodos a distancia <= radio de los nombres dados (BFS por niveles vectorizado)
+        visitados = np.zeros(len(self), dtype=bool)
+        frontera = np.array([self.ids[nombre] for nombre in nombres], dtype=np.int64)
+        visitados[frontera] = True
+        for _ in range(radio):
+            siguientes = np.unique(self.expandir(frontera))
+            frontera = siguientes[~visitados[siguientes]]
+            if not len(frontera):
+                break
+            visitados[frontera] = True
+        return visitados
+
+    def mascara_tipo(self, tipo):
+        if tipo not in self.categorias_tipo:
+            return np.zeros(len(self), dtype=bool)
+        return self.tipo == self.categorias_tipo.index(tipo)
+
+    def mascara_intereses(self, intereses, modo="or"):
+        # "or": alguno de los intereses; "and": todos
+        if isinstance(intereses, str):
+            intereses = [intereses]
+        columnas = [self.categorias_interes.index(i) for i in intereses if i in self.categorias_interes]
+        if modo == "and":
+            if len(columnas) < len(set(intereses)):
+                return np.zeros(len(self), dtype=bool)
+            return self.intereses[:, columnas].all(axis=1)
+        return self.intereses[:, columnas].any(axis=1)
+
+    def nombres_de(self, mascara):
+        return self.nombres[mascara].tolist()
+
+    def filtrar(self, mascara):
+        # Subgrafo inducido por la máscara, construido con operaciones vectorizadas
+        nuevo_id = np.full(len(self), -1, dtype=np.int64)
+        nuevo_id[mascara] = np.arange(np.count_nonzero(mascara))
+        conservar = mascara[self.filas] & mascara[self.indices]
+        filas = nuevo_id[self.filas[conservar]]
+        indptr = np.zeros(np.count_nonzero(mascara) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(filas, minlength=len(indptr) - 1), out=indptr[1:])
+        # El renumerado conserva el orden, así que las filas siguen ordenadas
+        return GrafoCSR(
+            self.nombres[mascara], indptr, nuevo_id[self.indices[conservar]].astype(self.indices.dtype),
+            self.pesos[conservar], self.tipo[mascara], self.categorias_tipo,
+            self.intereses[mascara], self.categorias_interes,
+        )
+
+    def filtrar_por_intereses(self, intereses, modo="or"):
+        return self.filtrar(self.mascara_intereses(intereses, modo))
+
+
+def _csr(n, origen, destino, peso):
+    # Arma los arreglos CSR simétricos a partir de una lista de aristas no dirigidas
+    filas = np.concatenate([origen, destino])
+    columnas = np.concatenate([destino, origen])
+    pesos = np.concatenate([peso, peso])
+    orden = np.lexsort((columnas, filas))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(filas, minlength=n), out=indptr[1:])
+    tipo_indices = np.int32 if n < 2**31 else np.int64
+    return indptr, columnas[orden].astype(tipo_indices), pesos[orden]
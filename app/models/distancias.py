@@ -0,0 +1,189 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+from models.cambios import ARISTA_AGREGADA, ARISTA_ELIMINADA
+from models.copia_escritura import CopiaEnEscritura
+
+SIN_DISTANCIA = -1
+
+
+def camino_mas_corto(vecinos, origen, destino):
+    # BFS bidireccional: avanza por niveles desde ambos extremos, siempre por la frontera más pequeña.
+    # `vecinos` es una función nodo -> iterable de vecinos. Devuelve la lista de nodos o None
+    if origen == destino:
+        return [origen]
+    padres = ({origen: None}, {destino: None})
+    fronteras = ([origen], [destino])
+    while fronteras[0] and fronteras[1]:
+        lado = 0 if len(fronteras[0]) <= len(fronteras[1]) else 1
+        propios, ajenos = padres[lado], padres[1 - lado]
+        siguiente = []
+        encuentros = []
+        # Se completa el nivel entero para quedarse con el encuentro más corto
+        for nodo in fronteras[lado]:
+            for vecino in vecinos(nodo):
+                if vecino in propios:
+                    continue
+                propios[vecino] = nodo
+                siguiente.append(vecino)
+                if vecino in ajenos:
+                    encuentros.append(vecino)
+        if encuentros:
+            mejor = min(encuentros, key=lambda nodo: _profundidad(ajenos, nodo))
+            return _unir(padres[0], padres[1], mejor)
+        fronteras = (siguiente, fronteras[1]) if lado == 0 else (fronteras[0], siguiente)
+    return None
+
+
+def _profundidad(padres, nodo):
+    profundidad = 0
+    while padres[nodo] is not None:
+        nodo = padres[nodo]
+        profundidad += 1
+    return profundidad
+
+
+def _unir(padres_ida, padres_vuelta, encuentro):
+    camino = []
+    nodo = encuentro
+    while nodo is not None:
+        camino.append(nodo)
+        nodo = padres_ida[nodo]
+    camino.reverse()
+    nodo = padres_vuelta[encuentro]
+    while nodo is not None:
+        camino.append(nodo)
+        nodo = padres_vuelta[nodo]
+    return camino
+
+
+class OraculoDistancias:
+    # Distancias aproximadas instantáneas usando nodos de referencia (landmarks): se precalcula un BFS
+    # desde cada uno y la distancia u-v se acota con la desigualdad triangular. Los cambios de aristas
+    # se aplican de forma incremental: las altas relajan distancias y las bajas solo rehacen los
+    # landmarks cuyo árbol de caminos mínimos usaba la arista eliminada
+
+    def __init__(self, cantidad=8, max_cambios=1000):
+        self.cantidad = cantidad
+        self.max_cambios = max_cambios  # Con más cambios pendientes conviene reconstruir todo
+        self.landmarks = []
+        self.version = None
+        self._distancias = {}  # nodo -> arreglo con su distancia a cada landmark (-1 si no lo alcanza)
+        self._cow_distancias = CopiaEnEscritura()
+        self._pendientes = []  # (tipo, arista) en orden de llegada
+        # Pasado max_cambios los pendientes se descartan y queda solo esta marca: una importación masiva
+        # no acumula una lista del tamaño de la carga hasta la próxima consulta
+        self._reconstruir = False
+
+    def copia(self):
+        # Copia independiente; las filas de distancias se modifican en el lugar, así que se comparten con copia
+        # en escritura (cada lado duplica una fila solo al modificarla)
+        otra = OraculoDistancias(self.cantidad, self.max_cambios)
+        otra.landmarks = list(self.landmarks)
+        otra.version = self.version
+        otra._distancias = self._cow_distancias.compartir(self._distancias)
+        otra._pendientes = list(self._pendientes)
+        otra._reconstruir = self._reconstruir
+        return otra
+
+    def al_cambiar(self, cambio):
+        # Suscriptor del historial de cambios del grafo
+        if cambio.tipo in (ARISTA_AGREGADA, ARISTA_ELIMINADA) and not self._reconstruir:
+            self._pendientes.append((cambio.tipo, cambio.clave))
+            if len(self._pendientes) > self.max_cambios:
+                self._pendientes = []
+                self._reconstruir = True
+
+    def obtener(self, vecinos, nodos, version):
+        # Deja el oráculo al día con la versión indicada; `nodos` es un iterable de (nodo, grado)
+        if self.version == version:
+            return self
+        nodos = list(nodos)
+        existentes = {nodo for nodo, _ in nodos}
+        if (not self.landmarks or self._reconstruir
+                or any(landmark not in existentes for landmark in self.landmarks)):
+            self._construir(vecinos, nodos)
+        else:
+            self._actualizar(vecinos)
+        self._pendientes = []
+        self._reconstruir = False
+        self.version = version
+        return self
+
+    def _construir(self, vecinos, nodos):
+        # Los nodos de mayor grado cubren más caminos mínimos y dan mejores cotas
+        self.landmarks = [nodo for nodo, _ in heapq.nlargest(self.cantidad, nodos, key=lambda par: par[1])]
+        self._distancias = {}
+        for i in range(len(self.landmarks)):
+            self._bfs(i, vecinos)
+
+    def _fila(self, nodo):
+        # Fila del nodo lista para modificar (nueva si aún no tenía)
+        return self._cow_distancias.modificable(
+            self._distancias, nodo, lambda: np.full(self.cantidad, SIN_DISTANCIA, dtype=np.int32)
+        )
+
+    def _bfs(self, i, vecinos):
+        for nodo in self._distancias:
+            self._fila(nodo)[i] = SIN_DISTANCIA
+        landmark = self.landmarks[i]
+        self._fila(landmark)[i] = 0
+        cola = deque([landmark])
+        while cola:
+            nodo = cola.popleft()
+            siguiente = self._distancias[nodo][i] + 1
+            for vecino in vecinos(nodo):
+                fila = self._fila(vecino)
+                if fila[i] == SIN_DISTANCIA:
+                    fila[i] = siguiente
+                    cola.append(vecino)
+
+    def _actualizar(self, vecinos):
+        sucios = set()
+        for tipo, (nodo1, nodo2) in self._pendientes:
+            fila1, fila2 = self._fila(nodo1), self._fila(nodo2)
+            for i in range(len(self.landmarks)):
+                if i in sucios:
+                    continue
+                d1, d2 = fila1[i], fila2[i]
+                if tipo == ARISTA_ELIMINADA:
+                    # Solo importa si la arista unía dos niveles consecutivos del BFS del landmark
+                    if d1 != SIN_DISTANCIA and d2 != SIN_DISTANCIA and abs(d1 - d2) == 1:
+                        sucios.add(i)
+                elif d1 != SIN_DISTANCIA and (d2 == SIN_DISTANCIA or d1 + 1 < d2):
+                    self._relajar(i, nodo2, d1 + 1, vecinos)
+                elif d2 != SIN_DISTANCIA and (d1 == SIN_DISTANCIA or d2 + 1 < d1):
+                    self._relajar(i, nodo1, d2 + 1, vecinos)
+        for i in sucios:
+            self._bfs(i, vecinos)
+
+    def _relajar(self, i, nodo, distancia, vecinos):
+        # Propaga una distancia más corta solo por la zona que mejora
+        self._fila(nodo)[i] = distancia
+        cola = deque([nodo])
+        while cola:
+            actual = cola.popleft()
+            siguiente = self._distancias[actual][i] + 1
+            for vecino in vecinos(actual):
+                fila = self._fila(vecino)
+                if fila[i] == SIN_DISTANCIA or siguiente < fila[i]:
+                    fila[i] = siguiente
+                    cola.append(vecino)
+
+    def cotas(self, nodo1, nodo2):
+        # (cota inferior, cota superior) de la distancia; (None, None) si ningún landmark alcanza a ambos
+        fila1, fila2 = self._distancias.get(nodo1), self._distancias.get(nodo2)
+        if fila1 is None or fila2 is None:
+            return None, None
+        validos = (fila1 != SIN_DISTANCIA) & (fila2 != SIN_DISTANCIA)
+        if nodo1 == nodo2:
+            return 0, 0
+        if not validos.any():
+            return None, None
+        return int(np.abs(fila1 - fila2)[validos].max()), int((fila1 + fila2)[validos].min())
+
+    def estimar(self, nodo1, nodo2):
+        # Distancia aproximada (la cota superior, que corresponde a un camino real vía un landmark)
+        return self.cotas(nodo1, nodo2)[1]
@@ -1,67 +1,460 @@
+import logging
+import threading
+
 import networkx as nx
-import matplotlib.pyplot as plt
-import community as community_louvain
+import numpy as np
 from collections import Counter
-import streamlit as st
+from models.layout import CacheLayout
+from models.comunidades import CacheParticiones, deteccion_multiple, particion_nivel
+from models.aristas import AlmacenAristas
+from models.copia_escritura import CopiaEnEscritura
+from models.csr import GrafoCSR
+from models.recomendaciones import Recomendador
+from models.distancias import camino_mas_corto, OraculoDistancias
+from models.busqueda import IndiceBusqueda
+from models.centralidad import centralidades, mas_centrales, desglosar
+from models.render import (
+    CachePNG, figura_a_png, top_k_por_grado, dibujar_nodos, grafo_cociente, dibujar_comunidades, escalar_tamanos,
+)
+from utils.config import (
+    LOD_UMBRAL_ETIQUETAS, LOD_UMBRAL_COMUNIDADES, LOD_TOP_K_ETIQUETAS,
+    COMUNIDADES_SEMILLAS, COMUNIDADES_RESOLUCIONES, COMUNIDADES_PROCESOS, COMUNIDADES_CONSENSO,
+    CENTRALIDAD_ERROR, CENTRALIDAD_CONFIANZA, CENTRALIDAD_TIEMPO_MAX,
+)
+from utils.instrumentacion import medir, bloque, registrar_cache, tamano_grafo
+from models.cambios import (
+    RegistroCambios, NODO_AGREGADO, NODO_ACTUALIZADO, NODO_ELIMINADO,
+    ARISTA_AGREGADA, ARISTA_ACTUALIZADA, ARISTA_ELIMINADA,
+)
+
+# La biblioteca no escribe en stdout (la CLI lo usa para su JSON): los detalles van al registro
+log = logging.getLogger(__name__)
+
+COLORES_TIPO = {"Estudiante": "blue", "Profesor": "red"}
+
+
+def perfil_vacio():
+    # Datos de un extremo de colaboración sin perfil (los mismos que devuelve la base de datos para él)
+    return {"programa_academico": None, "facultad": None, "nivel": None, "tipo": None,
+            "intereses": [], "habilidades_tecnicas": []}
+
 
 class SocialGraph:
     
-    def __init__(self):
+    def __init__(self, ruta_layout=None):
+        # Las colaboraciones viven en un almacén de aristas (fuente de verdad); G es su espejo en networkx
+        self.aristas = AlmacenAristas()
         # Inicializa un grafo vacío
         self.G = nx.Graph()
+        # Historial versionado de cambios; su versión sirve de llave para todas las cachés
+        self.cambios = RegistroCambios()
+        # Índice invertido interés -> conjunto de nodos que lo tienen
+        self.indice_intereses = {}
+        # Índice de texto (nombre, programa, facultad, nivel, habilidades) para autocompletar perfiles
+        self.indice_busqueda = IndiceBusqueda()
+        # Posiciones de los nodos reutilizadas entre ejecuciones (opcionalmente guardadas en disco)
+        self.layout = CacheLayout(ruta=ruta_layout)
+        # Partición de comunidades compartida por detect_communities y draw_graph
+        self.particiones = CacheParticiones()
+        self._comunidades_cache = None  # (llave, resultado) de la última detección nombrada
+        self._deteccion_multiple = None  # (versión, resultado) de la detección con varias semillas
+        # Distancias aproximadas por landmarks, actualizadas de forma incremental al cambiar aristas
+        self.oraculo = OraculoDistancias()
+        self._csr = None  # (versión, GrafoCSR) para la analítica vectorizada
+        self._recomendador = None  # (versión, Recomendador) con sus resultados cacheados
+        self._centralidad = None  # (versión, resultado) de grado, PageRank e intermediación
+        self.imagenes = CachePNG()  # Dibujos ya rasterizados por versión y vista
+        # Una instantánea la comparten lectores y cálculos de fondo: las cachés que se actualizan en el lugar
+        # (layout, particiones, oráculo) se consultan con este cerrojo
+        self._lock_caches = threading.RLock()
+        # Copia en escritura de lo que se comparte con las instantáneas (espejo en networkx e índice de intereses)
+        self._cow_nodos = CopiaEnEscritura()
+        self._cow_vecinos = CopiaEnEscritura()
+        self._cow_intereses = CopiaEnEscritura()
+
+        # Los índices y cachés se mantienen al día suscribiéndose al historial de cambios
+        self.cambios.suscribir(self._actualizar_indice_intereses)
+        self.cambios.suscribir(self._actualizar_indice_busqueda)
+        self.cambios.suscribir(self._notificar_caches)
+
+    @property
+    def version(self):
+        # Aumenta con cada cambio real del grafo
+        return self.cambios.version
+
+    def _notificar_caches(self, cambio):
+        # Las cachés incrementales se consultan al momento del cambio porque adoptar() puede reemplazarlas
+        self.layout.al_cambiar(cambio)
+        self.particiones.al_cambiar(cambio)
+        self.oraculo.al_cambiar(cambio)
+
+    def instantanea(self):
+        # Vista de solo lectura de la versión actual para leer y calcular en segundo plano mientras este grafo
+        # sigue cambiando. Comparte su estructura (G, aristas, oráculo e índices) con copia en escritura: cada
+        # pieza copia un puntero por nodo (o por término en el índice de búsqueda), nunca las aristas ni las
+        # filas de distancias, y este grafo duplica un nodo solo al modificarlo. Las cachés se copian tibias
+        copia = SocialGraph()
+        copia.aristas = self.aristas.copia()
+        copia.G = nx.Graph()
+        copia.G.graph.update(self.G.graph)
+        copia.G._node = self._cow_nodos.compartir(self.G._node)
+        copia.G._adj = self._cow_vecinos.compartir(self.G._adj)
+        nx.freeze(copia.G)
+        copia.cambios.version = self.version
+        copia.indice_intereses = self._cow_intereses.compartir(self.indice_intereses)
+        copia.indice_busqueda = self.indice_busqueda.copia()
+        copia.layout = self.layout.copia()
+        copia.particiones = self.particiones.copia()
+        copia.oraculo = self.oraculo.copia()
+        copia._csr = self._csr
+        copia._recomendador = self._recomendador
+        copia._deteccion_multiple = self._deteccion_multiple
+        copia._centralidad = self._centralidad
+        copia.imagenes = self.imagenes  # Llaves con versión: lo que dibuje la instantánea ya queda aquí
+        return copia
+
+    def adoptar(self, instantanea):
+        # Incorpora lo que se calculó sobre una instantánea. Los cambios hechos después de tomarla se
+        # reaplican desde el historial para que las cachés adoptadas los tengan pendientes
+        posteriores = self.cambios.desde(instantanea.version)
+        if posteriores is None:
+            return False  # El historial ya no alcanza: se descarta y se recalculará aquí
+        # Cada caché se toma solo si quedó más al día que la propia. La instantánea sigue en uso por otras
+        # sesiones y cálculos, así que de las incrementales se adopta una copia
+        with instantanea._lock_caches:
+            for atributo in ("layout", "oraculo"):
+                suya, propia = getattr(instantanea, atributo), getattr(self, atributo)
+                if suya.version is not None and (propia.version is None or propia.version < suya.version):
+                    suya = suya.copia()
+                    for cambio in posteriores:
+                        suya.al_cambiar(cambio)
+                    setattr(self, atributo, suya)
+            self.particiones.combinar(instantanea.particiones, posteriores)
+        for atributo in ("_csr", "_recomendador", "_deteccion_multiple", "_centralidad"):
+            suyo, propio = getattr(instantanea, atributo), getattr(self, atributo)
+            if suyo is not None and (propio is None or propio[0] < suyo[0]):
+                setattr(self, atributo, suyo)
+        return True
         
+    @medir(tamano=tamano_grafo)
     def add_node(self, nombre, datos):
-        # Agrega un nodo al grafo con un tipo asociado (ej. Estudiante o Profesor)
-        self.G.add_node(nombre, tipo=datos["tipo"])
+        # Agrega (o actualiza) un nodo con los datos de su perfil (tipo, intereses, etc.)
+        if nombre in self.G:
+            actuales = self.G.nodes[nombre]
+            if all(actuales.get(clave) == valor for clave, valor in datos.items()):
+                return  # Nada cambió: no se invalida ninguna caché
+            anterior = dict(actuales)
+            self._poseer((nombre,))
+            self.G.add_node(nombre, **datos)
+            self.cambios.registrar(NODO_ACTUALIZADO, nombre, anterior)
+        else:
+            self.G.add_node(nombre, **datos)
+            self.cambios.registrar(NODO_AGREGADO, nombre)
+
+    def add_nodes_from(self, perfiles):
+        # Carga masiva de perfiles como pares (nombre, datos)
+        for nombre, datos in perfiles:
+            self.add_node(nombre, datos)
+
+    @medir(tamano=tamano_grafo)
+    def remove_node(self, nombre):
+        # Elimina un nodo junto con sus conexiones (cada una queda registrada en el historial)
+        self._poseer([nombre, *self.aristas.vecinos(nombre)])
+        for clave in self.aristas.eliminar_nodo(nombre):
+            self.G.remove_edge(*clave)
+            self.cambios.registrar(ARISTA_ELIMINADA, clave)
+        anterior = dict(self.G.nodes[nombre])
+        self.G.remove_node(nombre)
+        self.cambios.registrar(NODO_ELIMINADO, nombre, anterior)
+
+    def _actualizar_indice_intereses(self, cambio):
+        # Mantiene el índice de intereses sincronizado con los cambios de nodos
+        if cambio.tipo in (NODO_ACTUALIZADO, NODO_ELIMINADO):
+            self._desindexar_intereses(cambio.clave, cambio.datos.get("intereses", []))
+        if cambio.tipo in (NODO_AGREGADO, NODO_ACTUALIZADO):
+            self._indexar_intereses(cambio.clave, self.G.nodes[cambio.clave].get("intereses", []))
+
+    def _actualizar_indice_busqueda(self, cambio):
+        # Reindexa el texto del perfil cuando se agrega, se actualiza o se elimina
+        if cambio.tipo == NODO_ELIMINADO:
+            self.indice_busqueda.eliminar(cambio.clave)
+        elif cambio.tipo in (NODO_AGREGADO, NODO_ACTUALIZADO):
+            self.indice_busqueda.agregar(cambio.clave, self.G.nodes[cambio.clave])
+
+    def _indexar_intereses(self, nombre, intereses):
+        # Registra el nodo en el índice bajo cada uno de sus intereses
+        for interes in intereses:
+            self._cow_intereses.modificable(self.indice_intereses, interes, set).add(nombre)
+
+    def _desindexar_intereses(self, nombre, intereses):
+        # Quita el nodo del índice bajo los intereses que tenía
+        for interes in intereses:
+            if interes in self.indice_intereses:
+                nodos = self._cow_intereses.modificable(self.indice_intereses, interes, set)
+                nodos.discard(nombre)
+                if not nodos:
+                    del self.indice_intereses[interes]
         
+    @medir(tamano=tamano_grafo)
     def add_edge(self, nodo1, nodo2, peso=1):
         # Agrega una conexión (arista) entre dos nodos con un peso opcional
+        anterior = self.aristas.agregar(nodo1, nodo2, peso)
+        if anterior == peso:
+            return
+        self._agregar_extremos((nodo1, nodo2))
+        self._poseer((nodo1, nodo2))
+        if anterior is not None:
+            self.G.remove_edge(nodo1, nodo2)  # Sus atributos pueden estar compartidos: se reemplaza la arista
         self.G.add_edge(nodo1, nodo2, weight=peso)
+        tipo = ARISTA_AGREGADA if anterior is None else ARISTA_ACTUALIZADA
+        self.cambios.registrar(tipo, self.aristas.clave(nodo1, nodo2), peso)
         
+    @medir(tamano=tamano_grafo)
     def remove_edge(self, nodo1, nodo2):
         # Elimina una conexión entre dos nodos
+        if not self.aristas.eliminar(nodo1, nodo2):
+            raise nx.NetworkXError(f"No existe colaboración entre {nodo1} y {nodo2}.")
+        self._poseer((nodo1, nodo2))
         self.G.remove_edge(nodo1, nodo2)
+        self.cambios.registrar(ARISTA_ELIMINADA, self.aristas.clave(nodo1, nodo2))
+
+    @medir(tamano=tamano_grafo)
+    def add_edges_from(self, aristas):
+        # Carga masiva de colaboraciones (tuplas de 2 o 3 elementos); el espejo en networkx se actualiza en un solo paso
+        cambiadas = self.aristas.agregar_varias(aristas)
+        self._agregar_extremos(nombre for nodo1, nodo2, _, anterior in cambiadas if anterior is None
+                               for nombre in (nodo1, nodo2))
+        self._poseer(nombre for nodo1, nodo2, _, _ in cambiadas for nombre in (nodo1, nodo2))
+        self.G.remove_edges_from((nodo1, nodo2) for nodo1, nodo2, _, anterior in cambiadas if anterior is not None)
+        self.G.add_weighted_edges_from((nodo1, nodo2, peso) for nodo1, nodo2, peso, _ in cambiadas)
+        for nodo1, nodo2, peso, anterior in cambiadas:
+            tipo = ARISTA_AGREGADA if anterior is None else ARISTA_ACTUALIZADA
+            self.cambios.registrar(tipo, (nodo1, nodo2), peso)
+
+    def _agregar_extremos(self, nombres):
+        # Los extremos sin perfil entran como perfiles vacíos por add_node, así quedan en el historial y los índices
+        for nombre in nombres:
+            if nombre not in self.G:
+                self.add_node(nombre, perfil_vacio())
+
+    def _poseer(self, nombres):
+        # Antes de modificar nodos de G se duplican sus atributos y vecinos si aún los comparte con una instantánea
+        for nombre in nombres:
+            if nombre in self.G:
+                self._cow_nodos.modificable(self.G._node, nombre)
+                self._cow_vecinos.modificable(self.G._adj, nombre)
+
+    @medir(tamano=tamano_grafo)
+    def remove_edges_from(self, aristas):
+        # Borrado masivo de colaboraciones; las que no existen se ignoran
+        eliminadas = self.aristas.eliminar_varias(aristas)
+        self._poseer(nombre for clave in eliminadas for nombre in clave)
+        self.G.remove_edges_from(eliminadas)
+        for clave in eliminadas:
+            self.cambios.registrar(ARISTA_ELIMINADA, clave)
+
+    @medir(tamano=tamano_grafo)
+    def hidratar(self, almacen):
+        # Carga todo el contenido del almacén persistente, por lotes
+        for lote in almacen.iterar_perfiles():
+            self.add_nodes_from(lote)
+        for lote in almacen.iterar_colaboraciones():
+            self.add_edges_from(lote)
+
+    @medir(tamano=tamano_grafo)
+    def hidratar_nodos(self, almacen, nombres):
+        # Carga de forma perezosa solo los perfiles indicados y las colaboraciones entre ellos
+        self.add_nodes_from(almacen.cargar_perfiles(nombres).items())
+        for lote in almacen.iterar_colaboraciones(nombres):
+            self.add_edges_from(lote)
+
+    def hidratar_interes(self, almacen, intereses, modo="or"):
+        # Carga la porción de la red que tiene los intereses buscados (lo que necesita la vista filtrada)
+        self.hidratar_nodos(almacen, almacen.nombres_por_interes(intereses, modo))
+
+    def hidratar_vecindario(self, almacen, nombre, radio=1):
+        # Carga el vecindario de un perfil hasta la distancia indicada
+        self.hidratar_nodos(almacen, almacen.vecindario(nombre, radio))
+
+    @medir(tamano=tamano_grafo)
+    def compacto(self):
+        # Representación CSR de enteros del grafo actual (se reconstruye solo si el grafo cambió)
+        vigente = self._csr is not None and self._csr[0] == self.version
+        registrar_cache("SocialGraph.compacto", vigente)
+        if not vigente:
+            self._csr = (self.version, GrafoCSR.desde_social_graph(self))
+        return self._csr[1]
+
+    @medir(tamano=tamano_grafo)
+    def recomendador(self):
+        # Motor de recomendaciones para la versión actual; guarda sus resultados hasta que el grafo cambie
+        vigente = self._recomendador is not None and self._recomendador[0] == self.version
+        registrar_cache("SocialGraph.recomendador", vigente)
+        if not vigente:
+            self._recomendador = (self.version, Recomendador.desde_social_graph(self))
+        return self._recomendador[1]
+
+    @medir(tamano=tamano_grafo)
+    def recomendar(self, nombre, k=5):
+        # Top-k de posibles colaboradores para un perfil: [(nombre, puntaje), ...]
+        return self.recomendador().top_k(nombre, k)
+
+    @medir(tamano=tamano_grafo)
+    def recomendar_todos(self, k=5, progreso=None):
+        # Top-k de posibles colaboradores para todos los perfiles (proceso por lotes)
+        return self.recomendador().top_k_todos(k, progreso)
+
+    @medir(tamano=tamano_grafo)
+    def centralidad(self, progreso=None):
+        # Grado, PageRank (ponderado por colaboraciones) e intermediación aproximada de todos los perfiles,
+        # calculados una vez por versión: {"nombres", "grado", "pagerank", "intermediacion", "muestras",
+        # "error", "confianza", "exacta"}. `progreso(hechas, total)` sigue el muestreo de la intermediación
+        vigente = self._centralidad is not None and self._centralidad[0] == self.version
+        registrar_cache("SocialGraph.centralidad", vigente)
+        if not vigente:
+            resultado = centralidades(
+                self.compacto(), error=CENTRALIDAD_ERROR, confianza=CENTRALIDAD_CONFIANZA,
+                tiempo_max=CENTRALIDAD_TIEMPO_MAX, progreso=progreso,
+            )
+            self._centralidad = (self.version, resultado)
+        return self._centralidad[1]
+
+    @medir(tamano=tamano_grafo)
+    def ranking_centralidad(self, medida="pagerank", k=10, por=None, nivel=None):
+        # Los k perfiles más centrales según "grado", "pagerank" o "intermediacion": [(nombre, valor)].
+        # Con `por` se desglosa por un atributo del perfil ("tipo", "facultad"...) o por "comunidad"
+        # (la de detect_communities, en el nivel indicado): {grupo: {"miembros", "media", "maximo", "top"}}
+        resultado = self.centralidad()
+        nombres, valores = resultado["nombres"], resultado[medida]
+        if por is None:
+            return mas_centrales(nombres, valores, k)
+        if por != "comunidad":
+            return desglosar(nombres, valores, [self.G.nodes[nombre].get(por) for nombre in nombres], k)
+        # Se agrupa por el id de la partición: varias comunidades pueden compartir nombre (el interés más
+        # común), así que el nombre solo sirve de etiqueta, acompañado del id
+        particion = self.particion() if nivel is None else self.particion_nivel(nivel)
+        _, comunidad_mapping = self.detect_communities(nivel=nivel)
+        resumen = desglosar(nombres, valores, [particion.get(nombre) for nombre in nombres], k)
+        return {f"{comunidad_mapping.get(grupo, 'Sin comunidad')} ({grupo})": datos for grupo, datos in resumen.items()}
+
+    @medir(tamano=tamano_grafo)
+    def camino_colaboracion(self, nodo1, nodo2):
+        # Camino más corto exacto entre dos perfiles (BFS bidireccional); None si no están conectados
+        if nodo1 not in self.G or nodo2 not in self.G:
+            return None
+        return camino_mas_corto(self.aristas.vecinos, nodo1, nodo2)
+
+    @medir(tamano=tamano_grafo)
+    def distancia_aproximada(self, nodo1, nodo2):
+        # Grados de separación estimados al instante con el oráculo de landmarks (para listas y rankings)
+        grados = ((nodo, self.aristas.grado(nodo)) for nodo in self.G)
+        with self._lock_caches:
+            return self.oraculo.obtener(self.aristas.vecinos, grados, self.version).estimar(nodo1, nodo2)
+
+    @medir(tamano=tamano_grafo)
+    def posiciones(self):
+        # Posiciones de todos los nodos para la versión actual del grafo (las vistas filtradas las reutilizan)
+        with self._lock_caches:
+            return self.layout.obtener(self.G, self.version)
+
+    def _posiciones_vista(self, G, umbral_comunidades=LOD_UMBRAL_COMUNIDADES):
+        # Posiciones para dibujar G. Las del grafo completo (cacheadas) sirven también para subgrafos, pero si la
+        # red completa se dibuja como supernodos su layout nunca se calcula: una vista filtrada no debe pagarlo,
+        # así que se ubica solo G partiendo de las posiciones que ya se conozcan
+        if G is self.G or len(self.G) <= umbral_comunidades or self.layout.version == self.version:
+            return self.posiciones()
+        with self._lock_caches:
+            conocidas = {nodo: self.layout.posiciones[nodo] for nodo in G if nodo in self.layout.posiciones}
+        with bloque("render.layout_vista", nodos=len(G)):
+            return nx.spring_layout(G, pos=conocidas or None, iterations=self.layout.iteraciones,
+                                    seed=self.layout.semilla)
+
+    @medir(tamano=tamano_grafo)
+    def particion(self, resolucion=1.0):
+        # Partición de Louvain para la versión actual; tras cambios pequeños solo se reoptimizan las comunidades tocadas
+        with self._lock_caches:
+            return self.particiones.obtener(self.G, self.version, resolucion)
         
-    def get_filtered_graph(self, interes, perfiles, colaboraciones):
-        # Filtra el grafo basado en un interés específico
-        resultados = {nombre for nombre, datos in perfiles.items() if interes in datos["intereses"]}
-        G_filtrado = nx.Graph()
-        
-        # Agrega solo los nodos que tienen el interés buscado
-        for nombre in resultados:
-            G_filtrado.add_node(nombre, tipo=perfiles[nombre]["tipo"])
-        
-        # Agrega las conexiones (aristas) entre los nodos filtrados
-        for colaboracion in colaboraciones:
-            if len(colaboracion) == 3:
-                n1, n2, peso = colaboracion
-            else:
-                n1, n2 = colaboracion
-                peso = 1  # Si no se proporciona peso, se usa el valor por defecto
-            if n1 in resultados and n2 in resultados:
-                G_filtrado.add_edge(n1, n2, weight=peso)
-        
-        return G_filtrado
+    @medir(tamano=tamano_grafo)
+    def buscar_nodos(self, intereses, modo="or"):
+        # Consulta el índice: "or" devuelve los nodos con alguno de los intereses, "and" los que tienen todos
+        if isinstance(intereses, str):
+            intereses = [intereses]
+        conjuntos = [self.indice_intereses.get(interes, set()) for interes in intereses]
+        if not conjuntos:
+            return set()
+        if modo == "and":
+            # Se intersecta empezando por el conjunto más pequeño
+            conjuntos.sort(key=len)
+            return set(conjuntos[0]).intersection(*conjuntos[1:])
+        return set().union(*conjuntos)
+
+    @medir(tamano=tamano_grafo)
+    def comunidades_estables(self, progreso=None):
+        # Detección con varias semillas y resoluciones en paralelo (reproducible), calculada una vez por versión:
+        # {"particion", "modularidad", "estabilidad", "dendrograma", "semilla", "resolucion"}
+        vigente = self._deteccion_multiple is not None and self._deteccion_multiple[0] == self.version
+        registrar_cache("SocialGraph.comunidades_estables", vigente)
+        if not vigente:
+            resultado = deteccion_multiple(
+                self.G, semillas=COMUNIDADES_SEMILLAS, resoluciones=COMUNIDADES_RESOLUCIONES,
+                consenso=COMUNIDADES_CONSENSO, procesos=COMUNIDADES_PROCESOS, progreso=progreso,
+            )
+            self._deteccion_multiple = (self.version, resultado)
+        return self._deteccion_multiple[1]
+
+    def niveles_comunidades(self):
+        # Cantidad de niveles del dendrograma (para acercarse de comunidades gruesas a finas)
+        return len(self.comunidades_estables()["dendrograma"])
+
+    def particion_nivel(self, nivel):
+        # Partición de un nivel del dendrograma sin volver a correr Louvain
+        return particion_nivel(self.comunidades_estables(), nivel)
+
+    @medir(tamano=tamano_grafo)
+    def buscar_perfiles(self, consulta, k=10):
+        # Autocompletado: los k perfiles que mejor coinciden con el texto (sin tildes, por prefijo o parecido)
+        return self.indice_busqueda.buscar(consulta, k)
+
+    @medir(tamano=tamano_grafo)
+    def get_filtered_graph(self, intereses, modo="or"):
+        # Devuelve una vista (sin copiar) del subgrafo inducido por los nodos con los intereses buscados;
+        # el costo depende solo de los nodos encontrados y no del tamaño de toda la red
+        return self.G.subgraph(self.buscar_nodos(intereses, modo))
     
-    def buscar_y_filtrar(self, interes):
-        # Obtiene perfiles y colaboraciones desde Streamlit
-        perfiles = st.session_state['perfiles']
-        colaboraciones = st.session_state['colaboraciones']
-        
-        # Filtra el grafo con base en el interés proporcionado
-        G_filtrado = self.get_filtered_graph(interes, perfiles, colaboraciones)
+    @medir(tamano=tamano_grafo)
+    def buscar_y_filtrar(self, intereses, modo="or", interes_seleccionado=""):
+        # Filtra el grafo con base en los intereses proporcionados usando el índice
+        G_filtrado = self.get_filtered_graph(intereses, modo)
         
         if len(G_filtrado.nodes) == 0:
-            print(f"No se encontraron nodos con el interés: {interes}")
+            log.info("No se encontraron nodos con el interés: %s", intereses)
             return None
         
-        # Dibuja el grafo filtrado con comunidades resaltadas
-        fig_filtrado = self.draw_graph(G=G_filtrado, fig_size=(6, 4), node_size=300, communities=True)
-        return fig_filtrado
+        # Dibuja el grafo filtrado con comunidades resaltadas (PNG cacheado por versión y búsqueda)
+        if isinstance(intereses, str):
+            intereses = [intereses]
+        return self.draw_graph_png(
+            G=G_filtrado, clave_vista=("intereses", tuple(intereses), modo),
+            fig_size=(6, 4), node_size=300, communities=True, interes_seleccionado=interes_seleccionado,
+        )
 
-    def detect_communities(self):
-        # Aplica el algoritmo de Louvain para detectar comunidades en el grafo
-        partition = community_louvain.best_partition(self.G)
+    @medir(tamano=tamano_grafo)
+    def detect_communities(self, resolucion=1.0, nivel=None, interes_seleccionado=""):
+        # El interés seleccionado (si lo hay) da nombre a la primera comunidad que lo contiene;
+        # lo pasa quien llama, así el grafo no depende de la sesión de la interfaz
+        interes_seleccionado = (interes_seleccionado or "").strip().lower()
+
+        # Si el grafo no cambió desde la última detección se reutiliza el resultado
+        llave = (self.version, resolucion, interes_seleccionado, nivel)
+        vigente = self._comunidades_cache is not None and self._comunidades_cache[0] == llave
+        registrar_cache("SocialGraph.detect_communities", vigente)
+        if vigente:
+            return self._comunidades_cache[1]
+
+        # Partición de Louvain cacheada por versión del grafo y resolución, o un nivel del dendrograma
+        # de la detección con varias semillas si se pide uno
+        partition = self.particion(resolucion) if nivel is None else self.particion_nivel(nivel)
         comunidades = {}
 
         # Agrupa nodos en comunidades detectadas
@@ -79,8 +472,6 @@ class SocialGraph:
         comunidades_nombradas = {}
         comunidad_mapping = {}
         
-        # Obtiene el interés seleccionado en la UI de Streamlit
-        interes_seleccionado = st.session_state.get('interes_seleccionado', "").strip().lower()
         comunidad_asignada = False  # Bandera para evitar asignar el mismo interés más de una vez
 
         for idx, (comunidad_id, nodos) in enumerate(comunidades.items()):
@@ -103,34 +494,56 @@ class SocialGraph:
             comunidades_nombradas[nombre_comunidad] = nodos
             comunidad_mapping[comunidad_id] = nombre_comunidad
 
-            # Asigna la comunidad a los nodos dentro del grafo
-            for nodo in nodos:
-                self.G.nodes[nodo]["comunidad"] = nombre_comunidad  
-
-            print(f"Comunidad '{nombre_comunidad}' tiene los intereses: {intereses_comunidad}")
+            log.debug("Comunidad '%s' tiene los intereses: %s", nombre_comunidad, intereses_comunidad)
         
+        self._comunidades_cache = (llave, (comunidades_nombradas, comunidad_mapping))
         return comunidades_nombradas, comunidad_mapping
 
-    def draw_graph(self, G=None, fig_size=(7, 4), node_size=320, communities=False, comunidad_mapping=None):
+    @medir(tamano=tamano_grafo)
+    def draw_graph(self, G=None, fig_size=(7, 4), node_size=320, communities=False, comunidad_mapping=None,
+                   leyenda_tipos=False, umbral_etiquetas=LOD_UMBRAL_ETIQUETAS,
+                   umbral_comunidades=LOD_UMBRAL_COMUNIDADES, top_k_etiquetas=LOD_TOP_K_ETIQUETAS,
+                   nivel_comunidades=None, interes_seleccionado="", tamano_por=None):
+        # matplotlib se importa solo al dibujar: filtrar o detectar comunidades no lo necesita
+        import matplotlib.pyplot as plt
+
         if G is None:
             G = self.G  # Usa el grafo principal si no se proporciona otro
         
-        pos = nx.spring_layout(self.G)  # Calcula la disposición de los nodos
         fig, ax = plt.subplots(figsize=fig_size)
 
+        if communities and comunidad_mapping is None:
+            # Reutiliza las comunidades ya detectadas (o las obtiene de la caché de particiones)
+            _, comunidad_mapping = self.detect_communities(
+                nivel=nivel_comunidades, interes_seleccionado=interes_seleccionado
+            )
+
+        if communities or len(G) > umbral_comunidades:
+            particion = self.particion() if nivel_comunidades is None else self.particion_nivel(nivel_comunidades)
+
+        # Nivel de detalle: en grafos muy grandes cada comunidad se dibuja como un supernodo
+        if len(G) > umbral_comunidades:
+            with bloque("render.comunidades", nodos=len(G)):
+                Q = grafo_cociente(G, particion)
+                pos_comunidades = nx.spring_layout(Q, weight="weight", seed=42)
+                dibujar_comunidades(ax, Q, pos_comunidades, comunidad_mapping or {}, top_k_etiquetas)
+            return fig
+
+        pos = self._posiciones_vista(G, umbral_comunidades)
+
+        if tamano_por:
+            # Tamaño de cada nodo según su centralidad ("grado", "pagerank" o "intermediacion")
+            ids = self.compacto().ids
+            valores = self.centralidad()[tamano_por]
+            node_size = escalar_tamanos(valores[[ids[n] for n in G]], node_size)
+
         if communities:
-            # Obtiene la partición de comunidades
-            partition = community_louvain.best_partition(self.G)
-            community_names, comunidad_mapping = self.detect_communities()
-            
-            # Asigna un color único a cada comunidad
-            comunidad_colors = {comunidad_id: i for i, comunidad_id in enumerate(set(partition.values()))}
-            
             unique_communities = set(comunidad_mapping.values())
             color_dict = {comunidad: plt.cm.Set3(i) for i, comunidad in enumerate(unique_communities)}
             
-            # Asigna colores a los nodos según la comunidad a la que pertenecen
-            color_map = [color_dict[self.G.nodes[n]["comunidad"]] if "comunidad" in self.G.nodes[n] else "gray" for n in self.G.nodes]
+            # Asigna colores a los nodos según la comunidad a la que pertenecen (la misma partición que nombró
+            # detect_communities; los nodos no se anotan porque su diccionario se comparte con las instantáneas)
+            color_map = [color_dict.get(comunidad_mapping.get(particion.get(n)), "gray") for n in G.nodes]
             
             # Crea la leyenda para las comunidades
             handles = [
@@ -139,8 +552,45 @@ class SocialGraph:
             ]
             ax.legend(handles, unique_communities, title="Comunidades", fontsize="small", frameon=False)
         else:
-            # Si no hay comunidades, colorea los nodos según su tipo
-            color_map = ["blue" if self.G.nodes[n]["tipo"] == "Estudiante" else "red" for n in self.G.nodes]
+            # Si no hay comunidades, colorea los nodos según su tipo (gris para los extremos sin perfil)
+            color_map = [COLORES_TIPO.get(self.G.nodes[n]["tipo"], "gray") for n in G.nodes]
         
-        nx.draw(self.G, pos, with_labels=True, node_color=color_map, ax=ax, node_size=node_size, cmap=plt.cm.Set3)
+        if len(G) > umbral_etiquetas:
+            # Grafo mediano: dibujo vectorizado, nodos más pequeños y etiquetas solo para los de mayor grado
+            tamano = np.maximum(10, node_size * umbral_etiquetas / len(G))
+            with bloque("render.vectorizado", nodos=len(G)):
+                dibujar_nodos(ax, G, pos, color_map, tamano, top_k_por_grado(G, top_k_etiquetas))
+        else:
+            with bloque("render.nx_draw", nodos=len(G)):
+                nx.draw(G, pos, with_labels=True, node_color=color_map, ax=ax, node_size=node_size, cmap=plt.cm.Set3)
+
+        if leyenda_tipos:
+            # Agrega una leyenda para distinguir entre estudiantes y profesores en el grafo
+            fig.legend(handles=[
+                plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='blue', markersize=10, label='Estudiantes'),
+                plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='red', markersize=10, label='Profesores')
+            ], loc='upper right')
         return fig
+
+    @medir(tamano=tamano_grafo)
+    def draw_graph_png(self, G=None, clave_vista=None, **opciones):
+        # Devuelve el dibujo como PNG; se reutiliza mientras no cambien el grafo ni los parámetros de la vista.
+        # Para subgrafos (G) hace falta una clave_vista que los identifique, si no, no se cachean
+        if opciones.get("communities"):
+            _, opciones["comunidad_mapping"] = self.detect_communities(
+                nivel=opciones.get("nivel_comunidades"), interes_seleccionado=opciones.get("interes_seleccionado", "")
+            )
+        cacheable = G is None or clave_vista is not None
+        if cacheable:
+            llave = (self.version, clave_vista, tuple(sorted(
+                (clave, tuple(sorted(valor.items())) if isinstance(valor, dict) else valor)
+                for clave, valor in opciones.items()
+            )))
+            png = self.imagenes.obtener(llave)
+            registrar_cache("SocialGraph.draw_graph_png", png is not None)
+            if png is not None:
+                return png
+        png = figura_a_png(self.draw_graph(G=G, **opciones))
+        if cacheable:
+            self.imagenes.guardar(llave, png)
+        return png
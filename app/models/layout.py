@@ -0,0 +1,147 @@
+import copy
+import json
+import math
+import os
+import random
+import threading
+
+import networkx as nx
+import numpy as np
+
+from models.cambios import nodos_estructurales
+from utils.instrumentacion import registrar_cache
+
+
+class CacheLayout:
+    # Mantiene las posiciones de los nodos entre ejecuciones y solo recalcula lo que cambió
+
+    def __init__(self, ruta=None, iteraciones=50, iteraciones_incrementales=20, fraccion_completa=0.3, semilla=42,
+                 max_pendientes=10000):
+        self.ruta = ruta  # Archivo opcional donde se guardan las posiciones
+        self.iteraciones = iteraciones
+        self.iteraciones_incrementales = iteraciones_incrementales
+        # Si cambió más de esta fracción de nodos se recalcula todo el layout (partiendo de las posiciones previas)
+        self.fraccion_completa = fraccion_completa
+        self.semilla = semilla
+        # Con más nodos pendientes que esto (p. ej. en una importación masiva) se deja de anotarlos y se marca
+        # un recálculo completo: la memoria no crece con el tamaño de la carga
+        self.max_pendientes = max_pendientes
+        self.posiciones = {}
+        self.version = None
+        self.pendientes = set()  # Nodos afectados por cambios desde el último cálculo
+        self.completo = False  # Los pendientes se desbordaron: hay que recalcular todo
+        self.cargadas = False  # Posiciones recién leídas de disco, todavía sin usar
+        self._aleatorio = random.Random(semilla)
+        if ruta and os.path.exists(ruta):
+            self.cargar()
+
+    def marcar(self, *nodos):
+        # Registra nodos cuya posición debe relajarse en el próximo cálculo
+        if self.completo:
+            return
+        self.pendientes.update(nodos)
+        if len(self.pendientes) > self.max_pendientes:
+            self.pendientes.clear()
+            self.completo = True
+
+    def al_cambiar(self, cambio):
+        # Suscriptor del historial de cambios del grafo
+        self.marcar(*nodos_estructurales(cambio))
+
+    def copia(self):
+        # Copia independiente; los arreglos de posiciones se reemplazan y nunca se modifican, así que se comparten
+        otra = copy.copy(self)
+        otra.posiciones = dict(self.posiciones)
+        otra.pendientes = set(self.pendientes)
+        otra._aleatorio = random.Random()
+        otra._aleatorio.setstate(self._aleatorio.getstate())
+        return otra
+
+    def obtener(self, G, version):
+        # Devuelve las posiciones para la versión indicada del grafo, calculándolas solo si hace falta
+        registrar_cache("CacheLayout", self.version == version)
+        if self.version == version:
+            return self.posiciones
+
+        # Descarta posiciones de nodos que ya no existen
+        for nodo in [n for n in self.posiciones if n not in G]:
+            del self.posiciones[nodo]
+
+        nuevos = {n for n in G if n not in self.posiciones}
+        if self.cargadas:
+            # Primer cálculo tras un reinicio: la hidratación marcó todo el grafo, pero las posiciones guardadas
+            # ya lo reflejan; solo se ubican los nodos sin posición y se relajan junto a sus vecinos
+            afectados = set(nuevos)
+            for nodo in nuevos:
+                afectados.update(G.adj[nodo])
+        elif self.completo:
+            afectados = set(G)
+        else:
+            afectados = {n for n in self.pendientes | nuevos if n in G}
+
+        if afectados:
+            if not self.posiciones or len(afectados) > self.fraccion_completa * len(G):
+                self._calcular_completo(G)
+            else:
+                self._calcular_incremental(G, nuevos, afectados)
+
+        self.version = version
+        self.pendientes.clear()
+        self.completo = self.cargadas = False
+        if self.ruta and afectados:
+            self.guardar()
+        return self.posiciones
+
+    def _calcular_completo(self, G):
+        # Layout completo, usando como punto de partida las posiciones que ya se conocían
+        inicial = {n: self.posiciones[n] for n in G if n in self.posiciones} or None
+        self.posiciones = nx.spring_layout(G, pos=inicial, iterations=self.iteraciones, seed=self.semilla)
+
+    def _calcular_incremental(self, G, nuevos, afectados):
+        # Coloca los nodos nuevos cerca de sus vecinos ya ubicados
+        for nodo in nuevos:
+            self.posiciones[nodo] = self._posicion_inicial(G, nodo)
+
+        # Solo se relajan los nodos afectados; sus vecinos participan como nodos fijos
+        zona = set(afectados)
+        for nodo in afectados:
+            zona.update(G.adj[nodo])
+        if len(zona) == 1:
+            return
+        fijos = [n for n in zona if n not in afectados]
+
+        # k se fija con el tamaño del grafo completo para conservar la escala del layout global
+        relajadas = nx.spring_layout(
+            G.subgraph(zona),
+            k=1 / math.sqrt(len(G)),
+            pos={n: self.posiciones[n] for n in zona},
+            fixed=fijos or None,
+            iterations=self.iteraciones_incrementales,
+            seed=self.semilla,
+        )
+        for nodo in afectados:
+            self.posiciones[nodo] = relajadas[nodo]
+
+    def _posicion_inicial(self, G, nodo):
+        # Promedio de los vecinos con posición más un pequeño desplazamiento; si no hay vecinos, al azar
+        vecinos = [self.posiciones[v] for v in G.adj[nodo] if v in self.posiciones]
+        ruido = np.array([self._aleatorio.uniform(-0.05, 0.05), self._aleatorio.uniform(-0.05, 0.05)])
+        if vecinos:
+            return np.mean(vecinos, axis=0) + ruido
+        return np.array([self._aleatorio.uniform(-1, 1), self._aleatorio.uniform(-1, 1)])
+
+    def guardar(self):
+        # Persiste las posiciones en disco para no recalcular el layout tras un reinicio
+        datos = {nombre: [float(p[0]), float(p[1])] for nombre, p in self.posiciones.items()}
+        # Temporal propio de cada hilo: varias instantáneas pueden guardar a la vez
+        temporal = f"{self.ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo, ensure_ascii=False)
+        os.replace(temporal, self.ruta)
+
+    def cargar(self):
+        # Carga posiciones guardadas; los nodos que falten se ubicarán de forma incremental
+        with open(self.ruta, encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+        self.posiciones = {nombre: np.array(p) for nombre, p in datos.items()}
+        self.cargadas = bool(self.posiciones)
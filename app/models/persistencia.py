@@ -0,0 +1,332 @@
+import sqlite3
+import threading
+
+from models.aristas import AlmacenAristas
+
+CAMPOS_PERFIL = ("programa_academico", "facultad", "nivel", "tipo")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS perfiles (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE,
+    programa_academico TEXT,
+    facultad TEXT,
+    nivel TEXT,
+    tipo TEXT
+);
+CREATE TABLE IF NOT EXISTS intereses (
+    perfil_id INTEGER NOT NULL REFERENCES perfiles(id) ON DELETE CASCADE,
+    orden INTEGER NOT NULL,
+    interes TEXT NOT NULL,
+    PRIMARY KEY (perfil_id, orden)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_intereses_interes ON intereses(interes, perfil_id);
+CREATE TABLE IF NOT EXISTS habilidades (
+    perfil_id INTEGER NOT NULL REFERENCES perfiles(id) ON DELETE CASCADE,
+    orden INTEGER NOT NULL,
+    habilidad TEXT NOT NULL,
+    PRIMARY KEY (perfil_id, orden)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS colaboraciones (
+    nodo1 INTEGER NOT NULL REFERENCES perfiles(id) ON DELETE CASCADE,
+    nodo2 INTEGER NOT NULL REFERENCES perfiles(id) ON DELETE CASCADE,
+    peso NUMERIC NOT NULL DEFAULT 1,
+    PRIMARY KEY (nodo1, nodo2)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_colaboraciones_nodo2 ON colaboraciones(nodo2, nodo1);
+"""
+
+CONSULTA_COLABORACIONES = """
+    SELECT c.nodo1, c.nodo2, p1.nombre, p2.nombre, c.peso
+    FROM colaboraciones c
+    JOIN perfiles p1 ON p1.id = c.nodo1
+    JOIN perfiles p2 ON p2.id = c.nodo2
+"""
+
+# Límite conservador de parámetros por consulta (SQLite antiguo admite 999)
+MAX_PARAMETROS = 500
+
+
+class AlmacenSQLite:
+    # Persistencia local de perfiles, intereses, habilidades y colaboraciones en SQLite
+
+    def __init__(self, ruta, tamano_lote=1000):
+        self.ruta = ruta
+        self.tamano_lote = tamano_lote
+        # Streamlit ejecuta cada rerun en un hilo distinto: la conexión se comparte protegida por un candado
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._candado = threading.RLock()
+        with self._candado:
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("PRAGMA synchronous=NORMAL")
+            self._conexion.execute("PRAGMA foreign_keys=ON")
+            self._conexion.executescript(ESQUEMA)
+
+    def cerrar(self):
+        with self._candado:
+            self._conexion.close()
+
+    # ----- Escritura -----
+
+    def guardar_perfil(self, nombre, datos):
+        # Inserta o actualiza un único perfil en su propia transacción
+        self.guardar_perfiles([(nombre, datos)])
+
+    def guardar_perfiles(self, perfiles):
+        # Guarda (nombre, datos) en transacciones por lotes; solo se reescriben los perfiles recibidos
+        lote = []
+        for perfil in perfiles:
+            lote.append(perfil)
+            if len(lote) >= self.tamano_lote:
+                self._guardar_lote_perfiles(lote)
+                lote = []
+        if lote:
+            self._guardar_lote_perfiles(lote)
+
+    def _guardar_lote_perfiles(self, lote):
+        lote = list(dict(lote).items())  # Si un nombre se repite en el lote, gana su última versión
+        with self._candado, self._conexion:
+            cursor = self._conexion.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO perfiles (nombre, programa_academico, facultad, nivel, tipo)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(nombre) DO UPDATE SET
+                    programa_academico = excluded.programa_academico,
+                    facultad = excluded.facultad,
+                    nivel = excluded.nivel,
+                    tipo = excluded.tipo
+                """,
+                [(nombre, *(datos.get(campo) for campo in CAMPOS_PERFIL)) for nombre, datos in lote],
+            )
+            ids = self._ids(cursor, [nombre for nombre, _ in lote])
+            perfil_ids = [(ids[nombre],) for nombre, _ in lote]
+            cursor.executemany("DELETE FROM intereses WHERE perfil_id = ?", perfil_ids)
+            cursor.executemany("DELETE FROM habilidades WHERE perfil_id = ?", perfil_ids)
+            cursor.executemany(
+                "INSERT INTO intereses (perfil_id, orden, interes) VALUES (?, ?, ?)",
+                [
+                    (ids[nombre], orden, interes)
+                    for nombre, datos in lote
+                    for orden, interes in enumerate(datos.get("intereses") or [])
+                ],
+            )
+            cursor.executemany(
+                "INSERT INTO habilidades (perfil_id, orden, habilidad) VALUES (?, ?, ?)",
+                [
+                    (ids[nombre], orden, habilidad)
+                    for nombre, datos in lote
+                    for orden, habilidad in enumerate(datos.get("habilidades_tecnicas") or [])
+                ],
+            )
+
+    def eliminar_perfil(self, nombre):
+        # Sus intereses, habilidades y colaboraciones se borran en cascada
+        with self._candado, self._conexion:
+            self._conexion.execute("DELETE FROM perfiles WHERE nombre = ?", (nombre,))
+
+    def guardar_colaboracion(self, nodo1, nodo2, peso=1):
+        self.guardar_colaboraciones([(nodo1, nodo2, peso)])
+
+    def guardar_colaboraciones(self, aristas):
+        # Inserta o actualiza colaboraciones por lotes; los extremos sin perfil se registran vacíos
+        lote = []
+        for arista in aristas:
+            lote.append(AlmacenAristas.normalizar(arista))
+            if len(lote) >= self.tamano_lote:
+                self._guardar_lote_colaboraciones(lote)
+                lote = []
+        if lote:
+            self._guardar_lote_colaboraciones(lote)
+
+    def _guardar_lote_colaboraciones(self, lote):
+        with self._candado, self._conexion:
+            cursor = self._conexion.cursor()
+            nombres = {nombre for nodo1, nodo2, _ in lote for nombre in (nodo1, nodo2)}
+            cursor.executemany("INSERT OR IGNORE INTO perfiles (nombre) VALUES (?)", [(n,) for n in nombres])
+            ids = self._ids(cursor, nombres)
+            cursor.executemany(
+                """
+                INSERT INTO colaboraciones (nodo1, nodo2, peso) VALUES (?, ?, ?)
+                ON CONFLICT(nodo1, nodo2) DO UPDATE SET peso = excluded.peso
+                """,
+                [self._fila_colaboracion(ids, nodo1, nodo2) + (peso,) for nodo1, nodo2, peso in lote],
+            )
+
+    def eliminar_colaboracion(self, nodo1, nodo2):
+        with self._candado, self._conexion:
+            cursor = self._conexion.cursor()
+            ids = self._ids(cursor, [nodo1, nodo2])
+            if len(ids) == 2:
+                cursor.execute(
+                    "DELETE FROM colaboraciones WHERE nodo1 = ? AND nodo2 = ?",
+                    self._fila_colaboracion(ids, nodo1, nodo2),
+                )
+
+    @staticmethod
+    def _fila_colaboracion(ids, nodo1, nodo2):
+        # Misma orientación canónica que el almacén de aristas en memoria
+        nodo1, nodo2 = AlmacenAristas.clave(nodo1, nodo2)
+        return ids[nodo1], ids[nodo2]
+
+    def _ids(self, cursor, nombres):
+        ids = {}
+        for grupo in _grupos(list(nombres), MAX_PARAMETROS):
+            marcadores = ",".join("?" * len(grupo))
+            cursor.execute(f"SELECT nombre, id FROM perfiles WHERE nombre IN ({marcadores})", grupo)
+            ids.update(cursor.fetchall())
+        return ids
+
+    # ----- Lectura -----
+
+    def contar_perfiles(self):
+        with self._candado:
+            return self._conexion.execute("SELECT COUNT(*) FROM perfiles").fetchone()[0]
+
+    def iterar_perfiles(self):
+        # Recorre todos los perfiles en lotes de (nombre, datos) con paginación por id
+        ultimo_id = 0
+        while True:
+            with self._candado:
+                filas = self._conexion.execute(
+                    f"SELECT id, nombre, {', '.join(CAMPOS_PERFIL)} FROM perfiles WHERE id > ? ORDER BY id LIMIT ?",
+                    (ultimo_id, self.tamano_lote),
+                ).fetchall()
+                if not filas:
+                    return
+                lote = self._armar_perfiles(filas)
+            ultimo_id = filas[-1][0]
+            yield lote
+
+    def cargar_perfiles(self, nombres=None):
+        # Devuelve {nombre: datos}; sin argumentos carga todos los perfiles
+        if nombres is None:
+            return {nombre: datos for lote in self.iterar_perfiles() for nombre, datos in lote}
+        perfiles = {}
+        with self._candado:
+            for grupo in _grupos(list(nombres), MAX_PARAMETROS):
+                marcadores = ",".join("?" * len(grupo))
+                filas = self._conexion.execute(
+                    f"SELECT id, nombre, {', '.join(CAMPOS_PERFIL)} FROM perfiles WHERE nombre IN ({marcadores})",
+                    grupo,
+                ).fetchall()
+                perfiles.update(self._armar_perfiles(filas))
+        return perfiles
+
+    def _armar_perfiles(self, filas):
+        # Completa las filas de perfiles con sus listas de intereses y habilidades
+        ids = [fila[0] for fila in filas]
+        intereses = self._listas("intereses", "interes", ids)
+        habilidades = self._listas("habilidades", "habilidad", ids)
+        perfiles = []
+        for perfil_id, nombre, *valores in filas:
+            datos = dict(zip(CAMPOS_PERFIL, valores))
+            datos["intereses"] = intereses.get(perfil_id, [])
+            datos["habilidades_tecnicas"] = habilidades.get(perfil_id, [])
+            perfiles.append((nombre, datos))
+        return perfiles
+
+    def _listas(self, tabla, columna, ids):
+        listas = {}
+        for grupo in _grupos(ids, MAX_PARAMETROS):
+            marcadores = ",".join("?" * len(grupo))
+            filas = self._conexion.execute(
+                f"SELECT perfil_id, {columna} FROM {tabla} WHERE perfil_id IN ({marcadores}) ORDER BY perfil_id, orden",
+                grupo,
+            )
+            for perfil_id, valor in filas:
+                listas.setdefault(perfil_id, []).append(valor)
+        return listas
+
+    def iterar_colaboraciones(self, nombres=None):
+        # Recorre las colaboraciones en lotes de (nodo1, nodo2, peso); con `nombres` solo las
+        # que tienen ambos extremos dentro de ese conjunto
+        if nombres is not None:
+            yield from self._colaboraciones_inducidas(nombres)
+            return
+        ultimo = (0, 0)
+        while True:
+            with self._candado:
+                filas = self._conexion.execute(
+                    f"""
+                    {CONSULTA_COLABORACIONES}
+                    WHERE (c.nodo1, c.nodo2) > (?, ?)
+                    ORDER BY c.nodo1, c.nodo2 LIMIT ?
+                    """,
+                    (*ultimo, self.tamano_lote),
+                ).fetchall()
+            if not filas:
+                return
+            ultimo = filas[-1][:2]
+            yield [fila[2:] for fila in filas]
+
+    def _colaboraciones_inducidas(self, nombres):
+        nombres = set(nombres)
+        with self._candado:
+            ids = list(self._ids(self._conexion.cursor(), nombres).values())
+        # Toda arista inducida tiene su extremo nodo1 en el conjunto; el otro extremo se filtra en memoria
+        for grupo in _grupos(ids, MAX_PARAMETROS):
+            marcadores = ",".join("?" * len(grupo))
+            with self._candado:
+                filas = self._conexion.execute(
+                    f"{CONSULTA_COLABORACIONES} WHERE c.nodo1 IN ({marcadores})", grupo
+                ).fetchall()
+            lote = [fila[2:] for fila in filas if fila[3] in nombres]
+            if lote:
+                yield lote
+
+    def nombres_por_interes(self, intereses, modo="or"):
+        # Usa el índice por interés: "or" cualquiera de los intereses, "and" todos
+        if isinstance(intereses, str):
+            intereses = [intereses]
+        if not intereses:
+            return set()
+        marcadores = ",".join("?" * len(intereses))
+        consulta = f"""
+            SELECT p.nombre FROM intereses i JOIN perfiles p ON p.id = i.perfil_id
+            WHERE i.interes IN ({marcadores})
+            GROUP BY i.perfil_id
+        """
+        parametros = list(intereses)
+        if modo == "and":
+            consulta += " HAVING COUNT(DISTINCT i.interes) = ?"
+            parametros.append(len(set(intereses)))
+        with self._candado:
+            return {fila[0] for fila in self._conexion.execute(consulta, parametros)}
+
+    def vecindario(self, nombre, radio=1):
+        # Nombres a distancia <= radio del perfil, expandiendo por niveles con los índices de colaboraciones
+        with self._candado:
+            fila = self._conexion.execute("SELECT id FROM perfiles WHERE nombre = ?", (nombre,)).fetchone()
+            if fila is None:
+                return set()
+            visitados = {fila[0]}
+            frontera = [fila[0]]
+            for _ in range(radio):
+                siguientes = set()
+                for grupo in _grupos(frontera, MAX_PARAMETROS):
+                    marcadores = ",".join("?" * len(grupo))
+                    filas = self._conexion.execute(
+                        f"""
+                        SELECT nodo2 FROM colaboraciones WHERE nodo1 IN ({marcadores})
+                        UNION SELECT nodo1 FROM colaboraciones WHERE nodo2 IN ({marcadores})
+                        """,
+                        grupo + grupo,
+                    )
+                    siguientes.update(fila[0] for fila in filas)
+                frontera = list(siguientes - visitados)
+                visitados.update(frontera)
+                if not frontera:
+                    break
+            nombres = set()
+            for grupo in _grupos(list(visitados), MAX_PARAMETROS):
+                marcadores = ",".join("?" * len(grupo))
+                filas = self._conexion.execute(f"SELECT nombre FROM perfiles WHERE id IN ({marcadores})", grupo)
+                nombres.update(fila[0] for fila in filas)
+            return nombres
+
+
+def _grupos(elementos, tamano):
+    # Parte una lista en trozos de a lo sumo `tamano` elementos
+    for inicio in range(0, len(elementos), tamano):
+        yield elementos[inicio:inicio + tamano]
@@ -0,0 +1,160 @@
+import numpy as np
+from scipy import sparse
+
+from utils.instrumentacion import registrar_cache
+
+
+class Recomendador:
+    # Sugiere colaboradores para pares aún no conectados combinando la red (Adamic-Adar sobre
+    # vecinos en común) con la coincidencia de intereses y de habilidades técnicas (coseno).
+    # Con pocos intereses casi todos los pares coinciden en algo, así que no se puntúa contra toda la red:
+    # los candidatos de cada perfil son los amigos de sus amigos más los miembros más conectados de cada
+    # interés y habilidad que tiene (a lo sumo `limite_cubeta` por cada uno). Todo se calcula con
+    # operaciones de matrices dispersas y arreglos; nunca se recorren pares en Python
+
+    def __init__(self, csr, listas_habilidades, peso_red=1.0, peso_intereses=0.5, peso_habilidades=0.5,
+                 tamano_bloque=1024, limite_cubeta=50):
+        self.csr = csr
+        self.peso_red = peso_red
+        self.peso_intereses = peso_intereses
+        self.peso_habilidades = peso_habilidades
+        self.tamano_bloque = tamano_bloque  # Filas por bloque en el cálculo masivo (acota la memoria)
+        n = len(csr)
+
+        # Adyacencia binaria y su versión escalada por 1/log(grado): A_aa[u] · A da Adamic-Adar(u, ·)
+        self.A = sparse.csr_matrix(
+            (np.ones(len(csr.indices), dtype=np.float32), csr.indices, csr.indptr), shape=(n, n)
+        )
+        grados = csr.grados()
+        inverso_log = np.zeros(n, dtype=np.float32)
+        con_vecinos = grados > 1  # Con grado 1 el logaritmo es 0: ese vecino no aporta
+        inverso_log[con_vecinos] = 1 / np.log(grados[con_vecinos])
+        self.A_aa = (self.A @ sparse.diags(inverso_log)).tocsr()
+
+        # Perfiles como vectores normalizados para que el producto sea la similitud coseno
+        self.intereses = _normalizar_filas(sparse.csr_matrix(csr.intereses, dtype=np.float32))
+        self.habilidades = _normalizar_filas(_matriz_habilidades(listas_habilidades, n))
+
+        # Cubetas (un interés o una habilidad): perfil -> cubetas que tiene, y cubeta -> sus mejores candidatos
+        self.cubetas = sparse.hstack([self.intereses, self.habilidades]).tocsr()
+        self.cubetas.data[:] = 1
+        self.representantes = _representantes(self.cubetas, grados, limite_cubeta)
+        self._cache = {}
+
+    @classmethod
+    def desde_social_graph(cls, graph, **opciones):
+        csr = graph.compacto()
+        habilidades = [graph.G.nodes[nombre].get("habilidades_tecnicas") or [] for nombre in csr.nombres]
+        return cls(csr, habilidades, **opciones)
+
+    def puntajes(self, filas):
+        # Matriz dispersa (filas x nodos) de puntajes de los candidatos, sin el propio nodo ni sus colaboradores actuales
+        filas = np.asarray(filas, dtype=np.int64)
+        red = sparse.csr_matrix(self.A_aa[filas] @ self.A)
+        candidatos = (red + self.cubetas[filas] @ self.representantes).tocoo()
+        locales, columnas = candidatos.row, candidatos.col
+        # Se descartan el propio perfil y sus colaboradores actuales antes de puntuar
+        nuevos = (columnas != filas[locales]) & (np.asarray(self.A[filas[locales], columnas]).ravel() == 0)
+        locales, columnas = locales[nuevos], columnas[nuevos]
+
+        # Cada término se evalúa solo en los pares candidatos
+        valores = self.peso_red * np.asarray(red[locales, columnas]).ravel()
+        if self.peso_intereses:
+            valores += self.peso_intereses * _coseno_pares(self.intereses, filas[locales], columnas)
+        if self.peso_habilidades:
+            valores += self.peso_habilidades * _coseno_pares(self.habilidades, filas[locales], columnas)
+        S = sparse.csr_matrix((valores.astype(np.float32), (locales, columnas)), shape=(len(filas), len(self.csr)))
+        S.eliminate_zeros()
+        return S
+
+    def _top_k_bloque(self, S, k):
+        # Los k mejores de cada fila con np.argpartition sobre las filas rellenadas a igual largo
+        largos = np.diff(S.indptr)
+        ancho = int(largos.max()) if len(largos) else 0
+        if ancho == 0:
+            return [[] for _ in range(S.shape[0])]
+        posicion = np.arange(S.nnz) - np.repeat(S.indptr[:-1], largos)
+        filas = np.repeat(np.arange(S.shape[0]), largos)
+        valores = np.full((S.shape[0], ancho), -np.inf, dtype=np.float32)
+        columnas = np.zeros((S.shape[0], ancho), dtype=np.int64)
+        valores[filas, posicion] = S.data
+        columnas[filas, posicion] = S.indices
+        k = min(k, ancho)
+        mejores = np.argpartition(-valores, k - 1, axis=1)[:, :k]
+        puntajes = np.take_along_axis(valores, mejores, axis=1)
+        elegidas = np.take_along_axis(columnas, mejores, axis=1)
+        # argpartition no ordena: solo se ordenan los k elegidos de cada fila
+        orden = np.argsort(-puntajes, axis=1, kind="stable")
+        puntajes = np.take_along_axis(puntajes, orden, axis=1)
+        elegidas = np.take_along_axis(elegidas, orden, axis=1)
+        nombres = self.csr.nombres
+        return [
+            [(nombres[columna], float(puntaje)) for columna, puntaje in zip(fila_c, fila_p) if puntaje > -np.inf]
+            for fila_c, fila_p in zip(elegidas, puntajes)
+        ]
+
+    def top_k(self, nombre, k=5):
+        # Sugerencias para un perfil: lista de (nombre, puntaje) de mayor a menor
+        llave = (nombre, k)
+        registrar_cache("Recomendador.top_k", llave in self._cache)
+        if llave not in self._cache:
+            if nombre not in self.csr.ids:
+                return []
+            self._cache[llave] = self._top_k_bloque(self.puntajes([self.csr.ids[nombre]]), k)[0]
+        return self._cache[llave]
+
+    def top_k_todos(self, k=5, progreso=None):
+        # Cálculo masivo para todos los perfiles, por bloques de filas: {nombre: sugerencias}.
+        # `progreso(hechas, total)` se llama al terminar cada bloque
+        llave = ("*", k)
+        if llave not in self._cache:
+            resultado = {}
+            for inicio in range(0, len(self.csr), self.tamano_bloque):
+                filas = np.arange(inicio, min(inicio + self.tamano_bloque, len(self.csr)))
+                for fila, sugerencias in zip(filas, self._top_k_bloque(self.puntajes(filas), k)):
+                    resultado[self.csr.nombres[fila]] = sugerencias
+                if progreso:
+                    progreso(filas[-1] + 1, len(self.csr))
+            self._cache[llave] = resultado
+        return self._cache[llave]
+
+
+def _representantes(cubetas, grados, limite):
+    # Matriz cubetas x nodos con los `limite` miembros de mayor grado de cada cubeta
+    miembros = cubetas.tocoo()
+    orden = np.lexsort((-grados[miembros.row], miembros.col))
+    cubeta, nodo = miembros.col[orden], miembros.row[orden]
+    inicios = np.searchsorted(cubeta, cubeta, side="left")
+    elegidos = np.arange(len(cubeta)) - inicios < limite
+    return sparse.csr_matrix(
+        (np.ones(np.count_nonzero(elegidos), dtype=np.float32), (cubeta[elegidos], nodo[elegidos])),
+        shape=(cubetas.shape[1], cubetas.shape[0]),
+    )
+
+
+def _coseno_pares(M, filas, columnas):
+    # Producto fila a fila M[filas[i]] · M[columnas[i]] (las filas ya están normalizadas)
+    if len(filas) == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.asarray(M[filas].multiply(M[columnas]).sum(axis=1)).ravel()
+
+
+def _matriz_habilidades(listas, n):
+    # Matriz dispersa nodos x habilidades (sin distinguir mayúsculas ni espacios sobrantes)
+    vocabulario = {}
+    filas, columnas = [], []
+    for fila, lista in enumerate(listas):
+        for habilidad in {h.strip().lower() for h in lista if h and h.strip()}:
+            filas.append(fila)
+            columnas.append(vocabulario.setdefault(habilidad, len(vocabulario)))
+    return sparse.csr_matrix(
+        (np.ones(len(filas), dtype=np.float32), (filas, columnas)), shape=(n, max(len(vocabulario), 1))
+    )
+
+
+def _normalizar_filas(M):
+    # Divide cada fila por su norma para que M · Mᵀ sea la similitud coseno
+    normas = np.sqrt(np.asarray(M.multiply(M).sum(axis=1)).ravel())
+    inversas = np.zeros_like(normas)
+    inversas[normas > 0] = 1 / normas[normas > 0]
+    return (sparse.diags(inversas) @ M).tocsr()
@@ -0,0 +1,123 @@
+import heapq
+import io
+import threading
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+
+from utils.instrumentacion import medir
+
+
+class CachePNG:
+    # Imágenes ya rasterizadas, indexadas por versión del grafo y parámetros de la vista (LRU acotada).
+    # Como la llave incluye la versión, el grafo y sus instantáneas comparten una sola caché entre hilos
+
+    def __init__(self, capacidad=32):
+        self.capacidad = capacidad
+        self._imagenes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, llave):
+        with self._lock:
+            png = self._imagenes.get(llave)
+            if png is not None:
+                self._imagenes.move_to_end(llave)
+            return png
+
+    def guardar(self, llave, png):
+        with self._lock:
+            self._imagenes[llave] = png
+            self._imagenes.move_to_end(llave)
+            while len(self._imagenes) > self.capacidad:
+                self._imagenes.popitem(last=False)
+
+
+@medir("render.figura_a_png")
+def figura_a_png(fig, dpi=100):
+    # Rasteriza la figura y la cierra para que matplotlib libere su memoria.
+    # matplotlib se importa solo al dibujar: el núcleo del grafo funciona sin cargarlo
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def top_k_por_grado(G, k):
+    # Los k nodos con más conexiones (selección parcial con heap, sin ordenar todo)
+    return [nodo for nodo, _ in heapq.nlargest(k, G.degree, key=lambda par: par[1])]
+
+
+def escalar_tamanos(valores, base):
+    # Tamaños de nodo proporcionales a la raíz de una medida (el área crece con el valor), entre 0.3 y 2 veces la base
+    valores = np.asarray(valores, dtype=float)
+    maximo = valores.max() if len(valores) else 0
+    if maximo <= 0:
+        return np.full(len(valores), float(base))
+    return base * (0.3 + 1.7 * np.sqrt(valores / maximo))
+
+
+def dibujar_nodos(ax, G, pos, colores, node_size, etiquetas):
+    # Todas las aristas en una sola LineCollection y todos los nodos en un solo scatter
+    from matplotlib.collections import LineCollection
+    from matplotlib.colors import to_rgba_array
+
+    nodos = list(G)
+    indice = {nodo: i for i, nodo in enumerate(nodos)}
+    coordenadas = np.array([pos[nodo] for nodo in nodos], dtype=float).reshape(-1, 2)
+    aristas = np.array([(indice[u], indice[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+    ax.add_collection(LineCollection(coordenadas[aristas], colors="gray", linewidths=0.5, alpha=0.4, zorder=1))
+    ax.scatter(coordenadas[:, 0], coordenadas[:, 1], c=to_rgba_array(colores), s=node_size, edgecolors="none", zorder=2)
+    # Solo se rotulan los nodos indicados (los de mayor grado)
+    for nodo in etiquetas:
+        ax.text(*pos[nodo], nodo, fontsize=8, ha="center", va="bottom", zorder=3)
+    ax.autoscale_view()
+    ax.set_axis_off()
+
+
+def grafo_cociente(G, particion):
+    # Colapsa cada comunidad en un supernodo; el peso de una arista cuenta las colaboraciones entre comunidades
+    nodos = list(G)
+    comunidad = np.array([particion[nodo] for nodo in nodos], dtype=np.int64)
+    indice = {nodo: i for i, nodo in enumerate(nodos)}
+    aristas = np.array([(indice[u], indice[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+    origen, destino = comunidad[aristas[:, 0]], comunidad[aristas[:, 1]]
+    externas = origen != destino
+    pares = np.stack([np.minimum(origen, destino), np.maximum(origen, destino)], axis=1)[externas]
+    pares, conteos = np.unique(pares, axis=0, return_counts=True)
+
+    Q = nx.Graph()
+    ids, tamanos = np.unique(comunidad, return_counts=True)
+    Q.add_nodes_from((int(c), {"tamano": int(t)}) for c, t in zip(ids, tamanos))
+    Q.add_weighted_edges_from((int(a), int(b), int(p)) for (a, b), p in zip(pares, conteos))
+    return Q
+
+
+def dibujar_comunidades(ax, Q, pos, nombres, top_k):
+    # Dibuja el grafo de comunidades: tamaño según miembros, grosor según colaboraciones entre ellas
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+    from matplotlib.colors import to_rgba_array
+
+    comunidades = list(Q)
+    indice = {c: i for i, c in enumerate(comunidades)}
+    coordenadas = np.array([pos[c] for c in comunidades], dtype=float).reshape(-1, 2)
+    aristas = list(Q.edges(data="weight"))
+    if aristas:
+        extremos = np.array([(indice[u], indice[v]) for u, v, _ in aristas], dtype=np.int64)
+        grosores = np.log1p([peso for _, _, peso in aristas])
+        ax.add_collection(LineCollection(coordenadas[extremos], colors="gray", linewidths=grosores, alpha=0.5, zorder=1))
+    tamanos = np.array([Q.nodes[c]["tamano"] for c in comunidades], dtype=float)
+    colores = [plt.cm.Set3(c % 12) for c in comunidades]
+    # El área total de los supernodos se reparte según cuántas comunidades hay que mostrar
+    escala = min(1.0, 50 / len(comunidades))
+    ax.scatter(coordenadas[:, 0], coordenadas[:, 1], s=escala * (40 + 600 * np.sqrt(tamanos / tamanos.max())),
+               c=to_rgba_array(colores), edgecolors="black", linewidths=0.3, zorder=2)
+    # Se rotulan las k comunidades más conectadas con su nombre y cantidad de miembros
+    for c in top_k_por_grado(Q, top_k):
+        ax.text(*pos[c], f"{nombres.get(c, f'Comunidad {c}')} ({Q.nodes[c]['tamano']})",
+                fontsize=8, ha="center", va="bottom", zorder=3)
+    ax.autoscale_view()
+    ax.set_axis_off()
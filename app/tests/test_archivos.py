@@ -0,0 +1,43 @@
+import pytest
+
+from models.graph import SocialGraph
+from utils.archivos import (exportar_colaboraciones, exportar_perfiles, importar_colaboraciones,
+                            importar_perfiles)
+
+
+def red_de_prueba():
+    graph = SocialGraph()
+    graph.add_node("Ana", {"programa_academico": "Sistemas", "facultad": "Ingeniería", "nivel": "Pregrado",
+                           "tipo": "Estudiante", "intereses": ["grafos", "IA"], "habilidades_tecnicas": ["Python"]})
+    graph.add_node("Luis", {"programa_academico": "Física", "facultad": "Ciencias", "nivel": "Posgrado",
+                            "tipo": "Profesor", "intereses": ["redes"], "habilidades_tecnicas": []})
+    graph.add_edge("Ana", "Luis", 3)
+    graph.add_edge("Luis", "Zoe")  # Zoe no tiene perfil: entra como extremo vacío
+    return graph
+
+
+def perfiles(graph):
+    return {nombre: dict(datos) for nombre, datos in graph.G.nodes(data=True) if datos.get("tipo") is not None}
+
+
+@pytest.mark.parametrize("formato", ["csv", "jsonl", "parquet"])
+def test_exportar_e_importar_conserva_la_red(tmp_path, formato):
+    original = red_de_prueba()
+    ruta_perfiles = tmp_path / f"perfiles.{formato}"
+    ruta_colaboraciones = tmp_path / f"colaboraciones.{formato}"
+    exportar_perfiles(original, str(ruta_perfiles))
+    exportar_colaboraciones(original, str(ruta_colaboraciones))
+
+    copia = SocialGraph()
+    assert importar_perfiles(copia, str(ruta_perfiles)) == (2, 0)
+    assert importar_colaboraciones(copia, str(ruta_colaboraciones)) == (2, 0)
+
+    assert perfiles(copia) == perfiles(original)
+    assert sorted(copia.aristas) == sorted(original.aristas)
+    assert copia.G.nodes["Zoe"]["tipo"] is None  # El extremo sin perfil vuelve a crearse vacío
+
+
+def test_los_extremos_sin_perfil_no_se_exportan(tmp_path):
+    ruta = tmp_path / "perfiles.jsonl"
+    exportar_perfiles(red_de_prueba(), str(ruta))
+    assert "Zoe" not in ruta.read_text(encoding="utf-8")
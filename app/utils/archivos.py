@@ -0,0 +1,223 @@
+import csv
+import io
+import json
+import os
+from itertools import islice
+
+# Campos de un perfil; las listas se guardan separadas por ";" en CSV
+CAMPOS_TEXTO = ("programa_academico", "facultad", "nivel", "tipo")
+CAMPOS_LISTA = ("intereses", "habilidades_tecnicas")
+COLUMNAS_PERFILES = ("nombre",) + CAMPOS_TEXTO + CAMPOS_LISTA
+COLUMNAS_COLABORACIONES = ("nodo1", "nodo2", "peso")
+
+TIPOS_VALIDOS = ("Estudiante", "Profesor")
+NIVELES_VALIDOS = ("Pregrado", "Posgrado")
+SEPARADOR_LISTA = ";"
+FORMATOS = ("csv", "jsonl", "parquet")
+TAMANO_LOTE = 10000
+
+
+def detectar_formato(origen, formato=None):
+    # El formato se toma del parámetro o de la extensión del archivo (ruta o archivo subido con .name)
+    if formato is None:
+        nombre = getattr(origen, "name", origen)
+        formato = os.path.splitext(str(nombre))[1].lstrip(".").lower()
+    if formato == "json":
+        formato = "jsonl"
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato!r} (use {', '.join(FORMATOS)})")
+    return formato
+
+
+def _abrir_texto(origen, modo="r"):
+    # Acepta una ruta o un archivo binario ya abierto (p. ej. el de st.file_uploader)
+    if isinstance(origen, (str, os.PathLike)):
+        return open(origen, modo, encoding="utf-8", newline="")
+    return io.TextIOWrapper(origen, encoding="utf-8", newline="")
+
+
+# ----- Lectura -----
+
+def leer_registros(origen, formato=None, tamano_lote=TAMANO_LOTE):
+    # Lee el archivo por lotes de diccionarios sin cargarlo completo en memoria
+    formato = detectar_formato(origen, formato)
+    if formato == "parquet":
+        import pyarrow.parquet as pq
+
+        for lote in pq.ParquetFile(origen).iter_batches(batch_size=tamano_lote):
+            yield lote.to_pylist()
+        return
+
+    archivo = _abrir_texto(origen)
+    try:
+        if formato == "csv":
+            filas = csv.DictReader(archivo)
+        else:
+            filas = (json.loads(linea) for linea in archivo if linea.strip())
+        while True:
+            lote = list(islice(filas, tamano_lote))
+            if not lote:
+                break
+            yield lote
+    finally:
+        if isinstance(origen, (str, os.PathLike)):
+            archivo.close()
+        else:
+            archivo.detach()  # Deja abierto el archivo del llamador
+
+
+def _lista(valor):
+    # Las listas pueden venir como lista (JSONL/Parquet) o como texto separado por ";" (CSV)
+    if valor is None or valor == "":
+        return []
+    if isinstance(valor, str):
+        return [parte.strip() for parte in valor.split(SEPARADOR_LISTA) if parte.strip()]
+    return [str(parte).strip() for parte in valor if str(parte).strip()]
+
+
+def validar_perfil(registro, fila=None):
+    # Valida un registro contra el esquema de perfiles y lo convierte en (nombre, datos)
+    donde = f"Fila {fila}: " if fila is not None else ""
+    nombre = str(registro.get("nombre") or "").strip()
+    if not nombre:
+        raise ValueError(f"{donde}el perfil no tiene nombre")
+    datos = {campo: str(registro.get(campo) or "").strip() for campo in CAMPOS_TEXTO}
+    if datos["tipo"] not in TIPOS_VALIDOS:
+        raise ValueError(f"{donde}tipo inválido {datos['tipo']!r} para {nombre} (use {' o '.join(TIPOS_VALIDOS)})")
+    if datos["nivel"] and datos["nivel"] not in NIVELES_VALIDOS:
+        raise ValueError(f"{donde}nivel inválido {datos['nivel']!r} para {nombre}")
+    for campo in CAMPOS_LISTA:
+        datos[campo] = _lista(registro.get(campo))
+    return nombre, datos
+
+
+def validar_colaboracion(registro, fila=None):
+    # Valida un registro de colaboración y lo convierte en (nodo1, nodo2, peso)
+    donde = f"Fila {fila}: " if fila is not None else ""
+    nodo1 = str(registro.get("nodo1") or "").strip()
+    nodo2 = str(registro.get("nodo2") or "").strip()
+    if not nodo1 or not nodo2:
+        raise ValueError(f"{donde}la colaboración debe tener nodo1 y nodo2")
+    if nodo1 == nodo2:
+        raise ValueError(f"{donde}{nodo1} no puede colaborar consigo mismo")
+    peso = registro.get("peso")
+    if peso is None or peso == "":
+        peso = 1
+    try:
+        peso = float(peso)
+    except (TypeError, ValueError):
+        raise ValueError(f"{donde}peso inválido {registro.get('peso')!r}") from None
+    if peso <= 0:
+        raise ValueError(f"{donde}el peso debe ser positivo")
+    return nodo1, nodo2, int(peso) if peso.is_integer() else peso
+
+
+def _validar_lotes(origen, validar, formato, tamano_lote, estricto):
+    # Valida cada lote; con estricto=False las filas inválidas se omiten y se cuentan
+    fila = 1
+    omitidas = 0
+    for lote in leer_registros(origen, formato, tamano_lote):
+        validos = []
+        for registro in lote:
+            try:
+                validos.append(validar(registro, fila))
+            except ValueError:
+                if estricto:
+                    raise
+                omitidas += 1
+            fila += 1
+        yield validos, omitidas
+
+
+def importar_perfiles(graph, origen, formato=None, almacen=None, tamano_lote=TAMANO_LOTE, estricto=True):
+    # Carga perfiles por lotes en el grafo (y en la base de datos si se indica); devuelve (cargados, omitidos)
+    cargados = omitidos = 0
+    for perfiles, omitidos in _validar_lotes(origen, validar_perfil, formato, tamano_lote, estricto):
+        graph.add_nodes_from(perfiles)
+        if almacen is not None:
+            almacen.guardar_perfiles(perfiles)
+        cargados += len(perfiles)
+    return cargados, omitidos
+
+
+def importar_colaboraciones(graph, origen, formato=None, almacen=None, tamano_lote=TAMANO_LOTE, estricto=True):
+    # Carga colaboraciones por lotes en el grafo (y en la base de datos si se indica); devuelve (cargadas, omitidas)
+    cargadas = omitidas = 0
+    for aristas, omitidas in _validar_lotes(origen, validar_colaboracion, formato, tamano_lote, estricto):
+        graph.add_edges_from(aristas)
+        if almacen is not None:
+            almacen.guardar_colaboraciones(aristas)
+        cargadas += len(aristas)
+    return cargadas, omitidas
+
+
+# ----- Escritura -----
+
+def _lotes(iterable, tamano_lote):
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tamano_lote))
+        if not lote:
+            return
+        yield lote
+
+
+def escribir_registros(destino, lotes, columnas, formato=None):
+    # Escribe lotes de diccionarios en el destino, un lote a la vez
+    formato = detectar_formato(destino, formato)
+    if formato == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        esquema = pa.schema([
+            (columna, pa.list_(pa.string()) if columna in CAMPOS_LISTA else
+             pa.float64() if columna == "peso" else pa.string())
+            for columna in columnas
+        ])
+        with pq.ParquetWriter(destino, esquema) as escritor:
+            for lote in lotes:
+                escritor.write_table(pa.Table.from_pylist(lote, schema=esquema))
+        return
+
+    archivo = _abrir_texto(destino, "w")
+    try:
+        if formato == "csv":
+            escritor = csv.DictWriter(archivo, fieldnames=columnas)
+            escritor.writeheader()
+            for lote in lotes:
+                escritor.writerows(
+                    {columna: SEPARADOR_LISTA.join(valor) if columna in CAMPOS_LISTA else valor
+                     for columna, valor in registro.items()}
+                    for registro in lote
+                )
+        else:
+            for lote in lotes:
+                archivo.writelines(json.dumps(registro, ensure_ascii=False) + "\n" for registro in lote)
+    finally:
+        if isinstance(destino, (str, os.PathLike)):
+            archivo.close()
+        else:
+            archivo.flush()
+            archivo.detach()
+
+
+def exportar_perfiles(graph, destino, formato=None, tamano_lote=TAMANO_LOTE):
+    # Exporta los perfiles del grafo recorriéndolos por lotes. Los extremos de colaboraciones sin perfil
+    # (sin tipo, ver perfil_vacio) no se exportan: no son perfiles válidos al reimportar y sus
+    # colaboraciones salen igual por exportar_colaboraciones
+    registros = (
+        {
+            "nombre": nombre,
+            **{campo: datos.get(campo) or "" for campo in CAMPOS_TEXTO},
+            **{campo: list(datos.get(campo) or []) for campo in CAMPOS_LISTA},
+        }
+        for nombre, datos in graph.G.nodes(data=True)
+        if datos.get("tipo") is not None
+    )
+    escribir_registros(destino, _lotes(registros, tamano_lote), COLUMNAS_PERFILES, formato)
+
+
+def exportar_colaboraciones(graph, destino, formato=None, tamano_lote=TAMANO_LOTE):
+    # Exporta las colaboraciones del almacén de aristas recorriéndolas por lotes
+    registros = ({"nodo1": nodo1, "nodo2": nodo2, "peso": peso} for nodo1, nodo2, peso in graph.aristas)
+    escribir_registros(destino, _lotes(registros, tamano_lote), COLUMNAS_COLABORACIONES, formato)
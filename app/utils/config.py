@@ -1 +1,32 @@
-INTERESES_OPCIONES = ["Proyectos Conjuntos", "Tutorías", "Publicaciones", "Tesis","Trabajo de investigación","Ponencias"]
\ No newline at end of file
+INTERESES_OPCIONES = ["Proyectos Conjuntos", "Tutorías", "Publicaciones", "Tesis","Trabajo de investigación","Ponencias"]
+
+# Archivo donde se guardan las posiciones del grafo para no recalcular el layout tras reiniciar la app
+RUTA_LAYOUT = "layout_grafo.json"
+
+# Base de datos SQLite con los perfiles y colaboraciones (persisten entre sesiones y reinicios)
+RUTA_BD = "red_social.db"
+
+# Nivel de detalle del dibujo: sobre este número de nodos solo se rotulan los de mayor grado...
+LOD_UMBRAL_ETIQUETAS = 200
+# ...y sobre este otro cada comunidad se dibuja como un único supernodo
+LOD_UMBRAL_COMUNIDADES = 2000
+# Cantidad de nodos (o comunidades) rotulados cuando el grafo es grande
+LOD_TOP_K_ETIQUETAS = 20
+
+# Resultados que muestra el buscador de perfiles al gestionar colaboraciones
+BUSQUEDA_MAX_RESULTADOS = 10
+
+# Detección de comunidades robusta: semillas por resolución, resoluciones a probar y procesos del pool
+# (None usa todos los núcleos); con consenso se combinan las corridas en lugar de elegir la mejor
+COMUNIDADES_SEMILLAS = 4
+COMUNIDADES_RESOLUCIONES = (0.8, 1.0, 1.2)
+COMUNIDADES_PROCESOS = None
+COMUNIDADES_CONSENSO = False
+
+# Centralidad: error máximo de la intermediación aproximada, con qué probabilidad se garantiza y
+# segundos disponibles para muestrear (None sin límite; si se agota se informa el error alcanzado)
+CENTRALIDAD_ERROR = 0.05
+CENTRALIDAD_CONFIANZA = 0.9
+CENTRALIDAD_TIEMPO_MAX = 10.0
+# Medidas de centralidad que ofrece la interfaz (etiqueta -> medida)
+CENTRALIDAD_OPCIONES = {"Grado": "grado", "PageRank": "pagerank", "Intermediación": "intermediacion"}
@@ -0,0 +1,95 @@
+import numpy as np
+
+from utils.config import INTERESES_OPCIONES
+
+# Catálogo para perfiles sintéticos: facultad -> (programas, habilidades técnicas típicas)
+FACULTADES = {
+    "Facultad de Ingeniería": (
+        ["Ingeniería de Sistemas", "Ingeniería Civil", "Ingeniería Industrial", "Ingeniería Electrónica"],
+        ["Programación", "Bases de Datos", "Redes", "Estadística", "Simulación", "Python"],
+    ),
+    "Facultad de Ciencias de la Salud": (
+        ["Medicina", "Enfermería", "Odontología"],
+        ["Anatomía", "Fisiología", "Farmacología", "Epidemiología"],
+    ),
+    "Facultad de Ciencias Jurídicas": (
+        ["Derecho", "Ciencia Política"],
+        ["Legislación", "Investigación Jurídica", "Oratoria"],
+    ),
+    "Facultad de Arquitectura y Diseño": (
+        ["Arquitectura", "Diseño Gráfico", "Diseño Industrial"],
+        ["Diseño", "Construcción", "Modelado 3D", "Dibujo"],
+    ),
+    "Ciencias Exactas": (
+        ["Matemáticas", "Física", "Economía"],
+        ["Estadística", "Modelado", "Cálculo", "Python"],
+    ),
+}
+NOMBRES = ["Santiago", "Valeria", "Andrés", "Lina", "Felipe", "Carolina", "Mateo", "Isabella", "Juan", "Daniela",
+           "Camilo", "Mariana", "Sebastián", "Laura", "Nicolás", "Paula"]
+APELLIDOS = ["Hernández", "Sánchez", "Llano", "Durán", "Múnera", "Osorio", "Rincón", "Torres", "Ruiz", "Gómez",
+             "Restrepo", "Castaño", "Giraldo", "Ramírez", "Zapata", "Vélez"]
+
+
+def nombre_sintetico(i):
+    # Nombre único y determinista para el perfil i (las colaboraciones se generan sin guardar los perfiles)
+    return f"{NOMBRES[i % len(NOMBRES)]} {APELLIDOS[(i // len(NOMBRES)) % len(APELLIDOS)]} {i}"
+
+
+def generar_perfiles(n, semilla=42, tamano_comunidad=50, proporcion_profesores=0.15):
+    # Genera (nombre, datos) perezosamente. Cada comunidad pertenece a una facultad y tiene intereses
+    # preferidos, así que los atributos quedan correlacionados con la estructura de la red
+    rng = np.random.default_rng(semilla)
+    facultades = list(FACULTADES)
+    intereses = [i for i in INTERESES_OPCIONES if i != "Etc."]
+    # Popularidad desigual de los intereses (tipo Zipf)
+    popularidad = 1 / np.arange(1, len(intereses) + 1)
+    popularidad /= popularidad.sum()
+    preferidos = {}
+    for i in range(n):
+        comunidad = i // tamano_comunidad
+        if comunidad not in preferidos:
+            preferidos = {comunidad: (
+                facultades[rng.integers(len(facultades))],
+                rng.choice(len(intereses), size=2, replace=False, p=popularidad),
+            )}
+        facultad, favoritos = preferidos[comunidad]
+        programas, habilidades = FACULTADES[facultad]
+        profesor = rng.random() < proporcion_profesores
+
+        # Uno a tres intereses: casi siempre alguno de los favoritos de la comunidad
+        cantidad = int(rng.integers(1, 4))
+        elegidos = {intereses[favoritos[0]]} if rng.random() < 0.8 else set()
+        while len(elegidos) < cantidad:
+            indice = favoritos[1] if rng.random() < 0.5 else rng.choice(len(intereses), p=popularidad)
+            elegidos.add(intereses[indice])
+
+        yield nombre_sintetico(i), {
+            "programa_academico": programas[rng.integers(len(programas))],
+            "facultad": facultad,
+            "nivel": "Posgrado" if profesor or rng.random() < 0.2 else "Pregrado",
+            "habilidades_tecnicas": [str(h) for h in rng.choice(habilidades, size=2, replace=False)],
+            "tipo": "Profesor" if profesor else "Estudiante",
+            "intereses": sorted(elegidos),
+        }
+
+
+def generar_colaboraciones(n, semilla=42, tamano_comunidad=50, grado_medio=6, prob_externa=0.05):
+    # Colaboraciones con estructura de comunidades: la mayoría dentro de la propia comunidad y una
+    # fracción `prob_externa` hacia cualquier perfil. Devuelve (nodo1, nodo2, peso) sin repetir pares
+    rng = np.random.default_rng(semilla + 1)
+    m = n * grado_medio // 2
+    origen = rng.integers(n, size=m)
+    inicio = origen // tamano_comunidad * tamano_comunidad
+    tamano = np.minimum(tamano_comunidad, n - inicio)
+    destino = np.where(
+        rng.random(m) < prob_externa,
+        rng.integers(n, size=m),
+        inicio + (rng.random(m) * tamano).astype(np.int64),
+    )
+    pares = np.stack([np.minimum(origen, destino), np.maximum(origen, destino)], axis=1)
+    pares = np.unique(pares[pares[:, 0] != pares[:, 1]], axis=0)
+    # El peso cuenta las colaboraciones entre el par (la mayoría tiene una sola)
+    pesos = 1 + rng.poisson(0.3, size=len(pares))
+    for (nodo1, nodo2), peso in zip(pares.tolist(), pesos.tolist()):
+        yield nombre_sintetico(nodo1), nombre_sintetico(nodo2), peso
@@ -0,0 +1,191 @@
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+
+class _Estado:
+    # Estado global del instrumentador (uno por proceso). Cuando está inactivo cada envoltura
+    # solo consulta si está activa y llama a la función original
+
+    def __init__(self, capacidad=100000):
+        self.activa = False  # Valor por defecto del proceso; cada hilo puede fijar el suyo (activar_hilo)
+        self.inicio = time.perf_counter()
+        self.eventos = deque(maxlen=capacidad)  # (nombre, inicio, duración, hilo, ciclo, datos) para la traza
+        self.totales = {}  # nombre -> [llamadas, segundos totales, máximo]; exactos aunque se descarten eventos
+        self.caches = {}  # nombre -> [aciertos, fallos]
+        self.lock = threading.Lock()
+        self.local = threading.local()  # Ciclo (rerun) actual de cada hilo y si mide o no
+        self.ciclos = itertools.count(1)  # Ids únicos de ciclo aunque los hilos se reutilicen
+
+
+_estado = _Estado()
+_NULO = nullcontext()
+
+
+def activar(activa=True):
+    # Para todo el proceso (CLI, benchmark); los hilos que fijaron su propio valor lo conservan
+    _estado.activa = activa
+
+
+def activar_hilo(activa=True):
+    # Solo para el hilo actual: en Streamlit todas las sesiones comparten el proceso, así que el
+    # interruptor de una sesión se aplica a sus reruns (y a los cálculos que piden, ver calculos.Trabajo)
+    _estado.local.activa = activa
+
+
+def esta_activa():
+    return getattr(_estado.local, "activa", _estado.activa)
+
+
+def reiniciar():
+    # Descarta todo lo registrado
+    with _estado.lock:
+        _estado.eventos.clear()
+        _estado.totales.clear()
+        _estado.caches.clear()
+
+
+def nuevo_ciclo():
+    # Marca el comienzo de un rerun en el hilo actual; el resumen por ciclo solo mira sus eventos
+    _estado.local.ciclo = next(_estado.ciclos)
+
+
+def ciclo_actual():
+    return getattr(_estado.local, "ciclo", 0)
+
+
+def fijar_ciclo(ciclo):
+    # Los hilos de fondo registran sus eventos en el ciclo del rerun que pidió el trabajo
+    _estado.local.ciclo = ciclo
+
+
+def _registrar(nombre, inicio, duracion, datos):
+    with _estado.lock:
+        _estado.eventos.append(
+            (nombre, inicio, duracion, threading.get_ident(), ciclo_actual(), datos)
+        )
+        total = _estado.totales.get(nombre)
+        if total is None:
+            _estado.totales[nombre] = [1, duracion, duracion]
+        else:
+            total[0] += 1
+            total[1] += duracion
+            total[2] = max(total[2], duracion)
+
+
+def medir(nombre=None, tamano=None):
+    # Decorador: registra tiempo de pared y llamadas. `tamano(*args, **kwargs)` puede devolver un
+    # diccionario con el tamaño del grafo en el momento de la llamada
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__qualname__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not esta_activa():
+                return funcion(*args, **kwargs)
+            datos = tamano(*args, **kwargs) if tamano else None
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                _registrar(etiqueta, inicio, time.perf_counter() - inicio, datos)
+        return envoltura
+    return decorador
+
+
+@contextmanager
+def _bloque_activo(nombre, datos):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registrar(nombre, inicio, time.perf_counter() - inicio, datos)
+
+
+def bloque(nombre, **datos):
+    # Mide un tramo de código: `with bloque("main.colaboraciones"): ...`
+    if not esta_activa():
+        return _NULO
+    return _bloque_activo(nombre, datos or None)
+
+
+def registrar_cache(nombre, acierto):
+    # Cuenta aciertos y fallos de una caché
+    if not esta_activa():
+        return
+    with _estado.lock:
+        conteo = _estado.caches.setdefault(nombre, [0, 0])
+        conteo[0 if acierto else 1] += 1
+
+
+def tamano_grafo(graph, *args, **kwargs):
+    # Tamaño del grafo para los métodos de SocialGraph (el primer argumento es self)
+    return {"nodos": graph.G.number_of_nodes(), "aristas": graph.G.number_of_edges()}
+
+
+# ----- Consultas y exportación -----
+
+def resumen(solo_ciclo=False):
+    # Filas {nombre, llamadas, total, media, maximo, ultimo_tamano} ordenadas por tiempo total.
+    # Con solo_ciclo se limita a los eventos del rerun actual del hilo que consulta
+    with _estado.lock:
+        if solo_ciclo:
+            ciclo = ciclo_actual()
+            totales, tamanos = {}, {}
+            for nombre, _, duracion, _, evento_ciclo, datos in _estado.eventos:
+                if evento_ciclo != ciclo:
+                    continue
+                total = totales.setdefault(nombre, [0, 0.0, 0.0])
+                total[0] += 1
+                total[1] += duracion
+                total[2] = max(total[2], duracion)
+                if datos:
+                    tamanos[nombre] = datos
+        else:
+            totales = {nombre: list(valores) for nombre, valores in _estado.totales.items()}
+            tamanos = {nombre: datos for nombre, _, _, _, _, datos in _estado.eventos if datos}
+    filas = [
+        {"nombre": nombre, "llamadas": llamadas, "total": total, "media": total / llamadas,
+         "maximo": maximo, "ultimo_tamano": tamanos.get(nombre)}
+        for nombre, (llamadas, total, maximo) in totales.items()
+    ]
+    return sorted(filas, key=lambda fila: fila["total"], reverse=True)
+
+
+def resumen_caches():
+    # {nombre: {"aciertos", "fallos", "tasa"}}
+    with _estado.lock:
+        return {
+            nombre: {"aciertos": a, "fallos": f, "tasa": a / (a + f) if a + f else 0.0}
+            for nombre, (a, f) in _estado.caches.items()
+        }
+
+
+def traza_chrome():
+    # Traza en el formato de eventos de Chrome (chrome://tracing, Perfetto): un evento completo por llamada
+    pid = os.getpid()
+    with _estado.lock:
+        eventos = list(_estado.eventos)
+    traza = [
+        {
+            "name": nombre, "cat": nombre.split(".")[0], "ph": "X", "pid": pid, "tid": hilo,
+            "ts": (inicio - _estado.inicio) * 1e6, "dur": duracion * 1e6,
+            "args": dict(datos or {}, ciclo=ciclo),
+        }
+        for nombre, inicio, duracion, hilo, ciclo, datos in eventos
+    ]
+    return {"traceEvents": traza, "displayTimeUnit": "ms", "otherData": {"caches": resumen_caches()}}
+
+
+def exportar_traza(destino):
+    # Escribe la traza en un archivo JSON (ruta) o en un archivo de texto ya abierto
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, "w", encoding="utf-8") as archivo:
+            json.dump(traza_chrome(), archivo)
+    else:
+        json.dump(traza_chrome(), destino)